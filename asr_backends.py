@@ -0,0 +1,186 @@
+# asr_backends.py
+# ----------------------------------------------------------
+# Speech recognition backends for Chacha
+# - one interface: start_session() -> feed(frame) / finish()
+# - stream() yields partial + final hypotheses as audio arrives
+# - google: today's recognize_google (needs network, final only)
+# - vosk:   fully offline, decodes while the user is still speaking
+# - fake:   deterministic transcripts for tests / WAV runs
+# ----------------------------------------------------------
+
+import json
+import os
+from collections import namedtuple
+
+import speech_recognition as sr
+
+# optional offline engine
+try:
+    import vosk
+except Exception:
+    vosk = None
+
+LANGUAGE = "en-IN"
+VOSK_MODEL_PATH = os.environ.get("CHACHA_VOSK_MODEL", "vosk-model-small-en-in-0.4")
+SAMPLE_WIDTH = 2
+
+Hypothesis = namedtuple("Hypothesis", "text is_final")
+
+
+class ASRSession:
+    """One utterance. feed() may return a partial transcript; finish() the final one."""
+
+    def feed(self, frame: bytes):
+        return None
+
+    def finish(self) -> str:
+        return ""
+
+    def cancel(self):
+        pass
+
+
+class ASRBackend:
+    name = "base"
+
+    def start_session(self, sample_rate: int) -> ASRSession:
+        raise NotImplementedError
+
+    def stream(self, frames, sample_rate=16000):
+        """Yield Hypothesis(text, is_final=False) while feeding, then the final one."""
+        session = self.start_session(sample_rate)
+        last = None
+        for frame in frames:
+            partial = session.feed(frame)
+            if partial and partial != last:
+                last = partial
+                yield Hypothesis(partial, False)
+        yield Hypothesis(session.finish(), True)
+
+    def transcribe(self, audio: sr.AudioData) -> str:
+        """Batch recognition of a finished sr.AudioData."""
+        session = self.start_session(audio.sample_rate)
+        session.feed(audio.get_raw_data(convert_width=SAMPLE_WIDTH))
+        return session.finish()
+
+
+# ----------------------------------------------------------
+# ☁️ Google (speech_recognition)
+# ----------------------------------------------------------
+class _GoogleSession(ASRSession):
+    def __init__(self, recognizer, sample_rate, language):
+        self._recognizer = recognizer
+        self._rate = sample_rate
+        self._language = language
+        self._chunks = []
+
+    def feed(self, frame):
+        self._chunks.append(frame)
+        return None   # Google has no partials over this API
+
+    def finish(self):
+        audio = sr.AudioData(b"".join(self._chunks), self._rate, SAMPLE_WIDTH)
+        self._chunks = []
+        try:
+            return self._recognizer.recognize_google(audio, language=self._language).strip()
+        except sr.UnknownValueError:
+            return ""
+
+    def cancel(self):
+        self._chunks = []
+
+
+class GoogleBackend(ASRBackend):
+    name = "google"
+
+    def __init__(self, language=LANGUAGE):
+        self.language = language
+        self._recognizer = sr.Recognizer()
+
+    def start_session(self, sample_rate):
+        return _GoogleSession(self._recognizer, sample_rate, self.language)
+
+
+# ----------------------------------------------------------
+# 🏠 Vosk (offline, CPU)
+# ----------------------------------------------------------
+class _VoskSession(ASRSession):
+    def __init__(self, model, sample_rate):
+        self._rec = vosk.KaldiRecognizer(model, sample_rate)
+        self._segments = []
+
+    def _partial(self):
+        partial = json.loads(self._rec.PartialResult()).get("partial", "")
+        return " ".join(self._segments + ([partial] if partial else []))
+
+    def feed(self, frame):
+        if self._rec.AcceptWaveform(frame):
+            text = json.loads(self._rec.Result()).get("text", "")
+            if text:
+                self._segments.append(text)
+            return " ".join(self._segments)
+        return self._partial()
+
+    def finish(self):
+        text = json.loads(self._rec.FinalResult()).get("text", "")
+        if text:
+            self._segments.append(text)
+        return " ".join(self._segments).strip()
+
+
+class VoskBackend(ASRBackend):
+    name = "vosk"
+
+    def __init__(self, model_path=VOSK_MODEL_PATH):
+        if vosk is None:
+            raise RuntimeError("vosk is not installed (pip install vosk)")
+        if not os.path.isdir(model_path):
+            raise RuntimeError(f"Vosk model not found: {model_path}")
+        vosk.SetLogLevel(-1)
+        self._model = vosk.Model(model_path)
+
+    def start_session(self, sample_rate):
+        return _VoskSession(self._model, sample_rate)
+
+
+# ----------------------------------------------------------
+# 🧪 Fake (deterministic)
+# ----------------------------------------------------------
+class _FakeSession(ASRSession):
+    def __init__(self, transcript, bytes_per_word):
+        self._words = transcript.split()
+        self._bytes_per_word = max(1, bytes_per_word)
+        self._fed = 0
+
+    def feed(self, frame):
+        self._fed += len(frame)
+        shown = min(len(self._words), self._fed // self._bytes_per_word)
+        return " ".join(self._words[:shown]) or None
+
+    def finish(self):
+        return " ".join(self._words)
+
+
+class FakeBackend(ASRBackend):
+    """Returns the given transcripts in order (cycling); one word per `ms_per_word` of audio."""
+    name = "fake"
+
+    def __init__(self, transcripts=("play music",), ms_per_word=300):
+        self.transcripts = list(transcripts)
+        self.ms_per_word = ms_per_word
+        self._next = 0
+
+    def start_session(self, sample_rate):
+        transcript = self.transcripts[self._next % len(self.transcripts)] if self.transcripts else ""
+        self._next += 1
+        return _FakeSession(transcript, int(sample_rate * SAMPLE_WIDTH * self.ms_per_word / 1000))
+
+
+BACKENDS = {"google": GoogleBackend, "vosk": VoskBackend, "fake": FakeBackend}
+
+
+def create_backend(name: str = "google", **kwargs) -> ASRBackend:
+    try:
+        return BACKENDS[name](**kwargs)
+    except KeyError:
+        raise ValueError(f"Unknown ASR backend: {name} (choose from {', '.join(BACKENDS)})")
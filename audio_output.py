@@ -0,0 +1,275 @@
+# audio_output.py
+# ----------------------------------------------------------
+# In-memory speech playback for Chacha
+# - one persistent PyAudio output stream (24 kHz mono s16le)
+# - encoded audio (edge-tts mp3 chunks) is decoded while it arrives:
+#     ffmpeg pipe  →  PCM blocks  →  output stream
+# - fallbacks: miniaudio (decode in memory), pygame Sound(BytesIO)
+# - no temporary files; playback can be stopped between blocks
+# ----------------------------------------------------------
+
+import importlib.util
+import io
+import queue
+import shutil
+import subprocess
+import threading
+import time
+
+# optional playback / decoding backends
+try:
+    import pyaudio
+except Exception:
+    pyaudio = None
+try:
+    import miniaudio
+except Exception:
+    miniaudio = None
+# pygame is slow to import and only the last fallback: imported on first use
+HAS_PYGAME = importlib.util.find_spec("pygame") is not None
+
+# CONFIG
+SAMPLE_RATE = 24000         # edge-tts voices are 24 kHz
+SAMPLE_WIDTH = 2
+BLOCK_MS = 40               # write granularity = how fast stop() takes effect
+FFMPEG = shutil.which("ffmpeg")
+
+
+def block_bytes(sample_rate=SAMPLE_RATE):
+    return int(sample_rate * BLOCK_MS / 1000) * SAMPLE_WIDTH
+
+
+# ----------------------------------------------------------
+# 🔈 Persistent output stream
+# ----------------------------------------------------------
+class AudioOutput:
+    """A PyAudio output stream that stays open for the whole session."""
+
+    def __init__(self, sample_rate=SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self.block = block_bytes(sample_rate)
+        self._pa = pyaudio.PyAudio()
+        self._stream = self._pa.open(format=pyaudio.paInt16, channels=1, rate=sample_rate,
+                                     output=True, frames_per_buffer=self.block // SAMPLE_WIDTH)
+        self._lock = threading.Lock()
+
+    def write(self, pcm: bytes, stop=None, on_first=None) -> bool:
+        """Play PCM in BLOCK_MS blocks; False if `stop` was set before the end."""
+        with self._lock:
+            for i in range(0, len(pcm), self.block):
+                if stop is not None and stop.is_set():
+                    return False
+                if on_first is not None:
+                    on_first()
+                    on_first = None
+                self._stream.write(pcm[i:i + self.block])
+        return True
+
+    def close(self):
+        try:
+            self._stream.stop_stream()
+            self._stream.close()
+            self._pa.terminate()
+        except Exception:
+            pass
+
+
+_output = None
+_output_tried = False
+_output_lock = threading.Lock()
+
+
+def get_output():
+    """Shared AudioOutput, opened on first use; None without PyAudio / a sound device."""
+    global _output, _output_tried
+    with _output_lock:
+        if not _output_tried:
+            _output_tried = True
+            if pyaudio is not None:
+                try:
+                    _output = AudioOutput()
+                except Exception as e:
+                    print("⚠️ Audio output stream unavailable:", e)
+    return _output
+
+
+# ----------------------------------------------------------
+# ▶️ One utterance
+# ----------------------------------------------------------
+class Playback:
+    """feed() encoded chunks as they arrive, then finish() blocks until played."""
+    backend = "none"
+    streaming = False   # True if audio starts before finish() is called
+
+    def __init__(self):
+        self.stop_event = threading.Event()
+        self.started_at = time.perf_counter()
+        self.first_audio_at = None
+        self.fed_bytes = 0
+        self.error = None   # set by backends that play on their own thread
+
+    def _mark_first(self):
+        if self.first_audio_at is None:
+            self.first_audio_at = time.perf_counter()
+
+    @property
+    def time_to_first_audio(self):
+        return None if self.first_audio_at is None else self.first_audio_at - self.started_at
+
+    def feed(self, data: bytes):
+        raise NotImplementedError
+
+    def finish(self, timeout=None) -> bool:
+        """Block until played; False if stopped, raises if the sound device failed."""
+        raise NotImplementedError
+
+    def stop(self):
+        self.stop_event.set()
+
+
+class _FFmpegPlayback(Playback):
+    """mp3 → ffmpeg (stdin/stdout pipes) → PCM blocks → AudioOutput, all streaming."""
+    backend = "ffmpeg"
+    streaming = True
+
+    def __init__(self, output):
+        super().__init__()
+        self._output = output
+        self._proc = subprocess.Popen(
+            [FFMPEG, "-hide_banner", "-loglevel", "error", "-fflags", "nobuffer",
+             "-probesize", "32", "-analyzeduration", "0", "-f", "mp3", "-i", "pipe:0",
+             "-f", "s16le", "-ac", "1", "-ar", str(output.sample_rate), "pipe:1"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        self._chunks = queue.Queue()
+        self._writer = threading.Thread(target=self._write_stdin, daemon=True)
+        self._reader = threading.Thread(target=self._play_stdout, daemon=True)
+        self._writer.start()
+        self._reader.start()
+
+    def _write_stdin(self):
+        try:
+            while True:
+                data = self._chunks.get()
+                if data is None or self.stop_event.is_set():
+                    break
+                self._proc.stdin.write(data)
+        except (BrokenPipeError, OSError):
+            pass
+        finally:
+            try:
+                self._proc.stdin.close()
+            except OSError:
+                pass
+
+    def _play_stdout(self):
+        try:
+            while not self.stop_event.is_set():
+                pcm = self._proc.stdout.read(self._output.block)
+                if not pcm:
+                    break
+                self._output.write(pcm, self.stop_event, self._mark_first)
+        except Exception as e:
+            print("⚠️ ffmpeg playback error:", e)
+            self.error = e
+
+    def feed(self, data):
+        self.fed_bytes += len(data)
+        self._chunks.put(data)
+
+    def finish(self, timeout=None):
+        self._chunks.put(None)
+        self._reader.join(timeout)
+        if self.stop_event.is_set() or self._reader.is_alive():
+            self._proc.kill()
+        self._proc.wait()
+        if self.error is not None:
+            raise self.error
+        return not self.stop_event.is_set()
+
+    def stop(self):
+        super().stop()
+        self._chunks.put(None)
+        try:
+            self._proc.kill()
+        except OSError:
+            pass
+
+
+class _BufferedPlayback(Playback):
+    """Collects the encoded bytes in memory and decodes them at finish()."""
+
+    def __init__(self, backend, output=None):
+        super().__init__()
+        self.backend = backend
+        self._output = output
+        self._buf = []
+
+    def feed(self, data):
+        self.fed_bytes += len(data)
+        self._buf.append(data)
+
+    def finish(self, timeout=None):
+        data = b"".join(self._buf)
+        if not data or self.stop_event.is_set():
+            return False
+        if self.backend == "miniaudio":
+            decoded = miniaudio.decode(data, output_format=miniaudio.SampleFormat.SIGNED16,
+                                       nchannels=1, sample_rate=self._output.sample_rate)
+            return self._output.write(decoded.samples.tobytes(), self.stop_event, self._mark_first)
+        # pygame: its own mixer channel, so pygame.mixer.music (the playlist) keeps playing
+        import pygame
+        if not pygame.mixer.get_init():
+            pygame.mixer.init()
+        channel = pygame.mixer.Sound(file=io.BytesIO(data)).play()
+        self._mark_first()
+        while channel is not None and channel.get_busy():
+            if self.stop_event.wait(0.02):
+                channel.stop()
+                return False
+        return True
+
+
+def decode(data: bytes, sample_rate=SAMPLE_RATE):
+    """Encoded audio (mp3 / wav) → mono s16le PCM bytes; None without ffmpeg / miniaudio."""
+    if FFMPEG:
+        proc = subprocess.run(
+            [FFMPEG, "-hide_banner", "-loglevel", "error", "-i", "pipe:0",
+             "-f", "s16le", "-ac", "1", "-ar", str(sample_rate), "pipe:1"],
+            input=data, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        if proc.returncode == 0 and proc.stdout:
+            return proc.stdout
+    if miniaudio is not None:
+        try:
+            decoded = miniaudio.decode(data, output_format=miniaudio.SampleFormat.SIGNED16,
+                                       nchannels=1, sample_rate=sample_rate)
+            return decoded.samples.tobytes()
+        except Exception as e:
+            print("⚠️ miniaudio decode error:", e)
+    return None
+
+
+def backend_name():
+    """Which in-memory backend open_playback() would use, or None."""
+    if get_output() is not None:
+        if FFMPEG:
+            return "ffmpeg"
+        if miniaudio is not None:
+            return "miniaudio"
+    if HAS_PYGAME:
+        return "pygame"
+    return None
+
+
+def open_playback():
+    """A new Playback on the best available backend, or None."""
+    name = backend_name()
+    try:
+        if name == "ffmpeg":
+            return _FFmpegPlayback(get_output())
+        if name == "miniaudio":
+            return _BufferedPlayback("miniaudio", get_output())
+        if name == "pygame":
+            return _BufferedPlayback("pygame")
+    except Exception as e:
+        print(f"⚠️ {name} playback unavailable:", e)
+    return None
@@ -0,0 +1,378 @@
+# audio_stream.py
+# ----------------------------------------------------------
+# Long-lived audio capture for Chacha
+# - Opens the microphone (or a WAV file) once and keeps reading
+# - Tracks the background noise floor continuously
+# - Energy based VAD (plus webrtcvad if installed) cuts utterances
+# - Non-speech segments are dropped locally, never sent to Google
+# ----------------------------------------------------------
+
+import collections
+import queue
+import threading
+import time
+import wave
+
+import numpy as np
+import speech_recognition as sr
+
+# optional: better speech/non-speech decisions when available
+try:
+    import webrtcvad
+except Exception:
+    webrtcvad = None
+
+# CONFIG
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2            # 16-bit PCM
+FRAME_MS = 30               # webrtcvad accepts 10 / 20 / 30 ms
+PAUSE_THRESHOLD = 0.6       # seconds of silence that end an utterance
+PHRASE_TIME_LIMIT = 8.0     # hard cut for very long utterances
+PREROLL_MS = 300            # audio kept from before the speech onset
+ONSET_FRAMES = 3            # consecutive speech frames needed to start
+MIN_SPEECH_MS = 250         # shorter voiced segments are thrown away
+SPEECH_RATIO = 3.0          # speech when energy > noise_floor * ratio
+MIN_ENERGY = 150.0          # absolute floor for the speech threshold
+NOISE_ALPHA = 0.05          # noise floor EMA while silent
+NOISE_ALPHA_SPEECH = 0.002  # very slow drift while "speaking" (fan turned on, etc.)
+BARGE_IN_RATIO = 12.0       # while muted, only this much louder than the noise floor counts
+BARGE_IN_ECHO_RATIO = 2.5   # ... and this much louder than our own speech as the mic hears it
+BARGE_IN_FRAMES = 5         # ... for this many consecutive frames
+ECHO_ALPHA = 0.05           # EMA of the mic level while our own speech plays
+VAD_AGGRESSIVENESS = 2
+QUEUE_SIZE = 8
+
+
+def frame_energy(frame: bytes) -> float:
+    """RMS energy of a 16-bit PCM frame."""
+    samples = np.frombuffer(frame, dtype=np.int16)
+    if samples.size == 0:
+        return 0.0
+    return float(np.sqrt(np.mean(samples.astype(np.float32) ** 2)))
+
+
+class _MicReader:
+    """Keeps one sr.Microphone stream open for the lifetime of the assistant."""
+
+    def __init__(self, sample_rate, frame_samples):
+        self.sample_rate = sample_rate
+        self.frame_samples = frame_samples
+        self._mic = sr.Microphone(sample_rate=sample_rate, chunk_size=frame_samples)
+        self._source = None
+
+    def open(self):
+        self._source = self._mic.__enter__()
+
+    def read(self):
+        return self._source.stream.read(self.frame_samples)
+
+    def close(self):
+        if self._source is not None:
+            try:
+                self._mic.__exit__(None, None, None)
+            except Exception:
+                pass
+            self._source = None
+
+
+class _WavReader:
+    """Feeds a WAV file through the same pipeline (testing without a mic)."""
+
+    def __init__(self, path, frame_ms, realtime=False):
+        self.path = path
+        self.frame_ms = frame_ms
+        self.realtime = realtime
+        self._wav = None
+        self.sample_rate = SAMPLE_RATE
+        self.frame_samples = 0
+        self._channels = 1
+
+    def open(self):
+        self._wav = wave.open(self.path, "rb")
+        if self._wav.getsampwidth() != SAMPLE_WIDTH:
+            raise ValueError("WAV source must be 16-bit PCM")
+        self.sample_rate = self._wav.getframerate()
+        self._channels = self._wav.getnchannels()
+        self.frame_samples = int(self.sample_rate * self.frame_ms / 1000)
+
+    def read(self):
+        data = self._wav.readframes(self.frame_samples)
+        if self._channels > 1 and data:
+            samples = np.frombuffer(data, dtype=np.int16).reshape(-1, self._channels)
+            data = samples.mean(axis=1).astype(np.int16).tobytes()
+        if self.realtime:
+            time.sleep(self.frame_ms / 1000)
+        return data
+
+    def close(self):
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+
+
+class Utterance:
+    """
+    A finished speech segment; `session` holds the ASR that decoded it while it was spoken.
+    muted: is_muted() was true when it started (and it was no barge-in), so it is
+    most likely our own voice; decided at onset, not when it is transcribed.
+    """
+
+    def __init__(self, audio, session=None, partial="", muted=False):
+        self.audio = audio
+        self.session = session
+        self.partial = partial
+        self.muted = muted
+
+
+class AudioStream:
+    """
+    One capture thread that never stops listening.
+    Finished utterances are queued as Utterance; get_utterance() pops them.
+    With an `asr` backend, frames are fed to it as they arrive so decoding
+    overlaps with speaking; on_partial(text) sees the partial hypotheses.
+    While is_muted() is true (e.g. voice.is_speaking) no new utterance starts,
+    so the assistant does not hear its own voice; only speech clearly louder
+    than the noise floor and than the measured echo of that playback
+    (echo_level) calls on_barge_in(), and if that returns True the
+    utterance starts anyway.
+    """
+
+    def __init__(self, wav_path=None, sample_rate=SAMPLE_RATE, frame_ms=FRAME_MS,
+                 pause_threshold=PAUSE_THRESHOLD, phrase_time_limit=PHRASE_TIME_LIMIT,
+                 realtime=False, asr=None, on_partial=None, is_muted=None, on_barge_in=None):
+        self.asr = asr
+        self.is_muted = is_muted
+        self.on_barge_in = on_barge_in
+        self.on_partial = on_partial
+        self._session = None
+        self._partial = ""
+        self._muted_onset = False
+        self.frame_ms = frame_ms
+        self.pause_threshold = pause_threshold
+        self.phrase_time_limit = phrase_time_limit
+        if wav_path:
+            self._reader = _WavReader(wav_path, frame_ms, realtime=realtime)
+        else:
+            self._reader = _MicReader(sample_rate, int(sample_rate * frame_ms / 1000))
+        self._queue = queue.Queue(maxsize=QUEUE_SIZE)
+        self._thread = None
+        self._running = False
+        self.finished = threading.Event()   # set when the source is exhausted
+        self.noise_floor = None
+        self.echo_level = None      # mic energy of our own playback (loudspeaker echo)
+        self._vad = None
+        self.stats = {"frames": 0, "utterances": 0, "discarded": 0, "dropped": 0, "asr_errors": 0, "muted": 0, "barge_in": 0}
+
+    # ------------------------------------------------------
+    def start(self):
+        """Open the source and start the capture thread (safe to call twice)."""
+        if self._running:
+            return self
+        self._reader.open()
+        if webrtcvad is not None and self._reader.sample_rate in (8000, 16000, 32000, 48000):
+            self._vad = webrtcvad.Vad(VAD_AGGRESSIVENESS)
+        self._running = True
+        self.finished.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def get_utterance(self, timeout=None):
+        """Next finished Utterance or None on timeout / end of source."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = 0.1 if deadline is None else min(0.1, deadline - time.monotonic())
+            if wait <= 0:
+                return None
+            try:
+                return self._queue.get(timeout=wait)
+            except queue.Empty:
+                if self.finished.is_set() and self._queue.empty():
+                    return None
+
+    # ------------------------------------------------------
+    def _is_speech(self, frame, energy):
+        threshold = max(MIN_ENERGY, (self.noise_floor or 0.0) * SPEECH_RATIO)
+        if energy < threshold:
+            return False
+        if self._vad is not None:
+            try:
+                return self._vad.is_speech(frame, self._reader.sample_rate)
+            except Exception:
+                return True
+        return True
+
+    def _is_barge_in(self, energy):
+        # no echo measured yet: loud playback alone must not stop itself
+        return self.on_barge_in is not None and self.echo_level is not None and \
+            energy >= max(MIN_ENERGY, (self.noise_floor or 0.0)) * BARGE_IN_RATIO and \
+            energy >= self.echo_level * BARGE_IN_ECHO_RATIO
+
+    def _update_echo_level(self, energy):
+        if self.echo_level is None:
+            self.echo_level = energy
+        else:
+            self.echo_level += ECHO_ALPHA * (energy - self.echo_level)
+
+    def _update_noise_floor(self, energy, alpha):
+        if self.noise_floor is None:
+            self.noise_floor = energy
+        else:
+            self.noise_floor += alpha * (energy - self.noise_floor)
+
+    # ------------------------------------------------------
+    def _asr_start(self, frames):
+        self._partial = ""
+        if self.asr is None:
+            return
+        try:
+            self._session = self.asr.start_session(self._reader.sample_rate)
+        except Exception as e:
+            print("🎤 ASR session error:", e)
+            self.stats["asr_errors"] += 1
+            self._session = None
+            return
+        for frame in frames:
+            self._asr_feed(frame)
+
+    def _asr_feed(self, frame):
+        if self._session is None:
+            return
+        try:
+            partial = self._session.feed(frame)
+        except Exception as e:
+            # the utterance is still queued; listen_once transcribes it in one go
+            print("🎤 ASR feed error:", e)
+            self.stats["asr_errors"] += 1
+            self._session = None
+            return
+        if partial and partial != self._partial:
+            self._partial = partial
+            if self.on_partial is not None:
+                try:
+                    self.on_partial(partial)
+                except Exception:
+                    pass
+
+    def _emit(self, frames, voiced_frames):
+        session, self._session = self._session, None
+        if voiced_frames * self.frame_ms < MIN_SPEECH_MS:
+            self.stats["discarded"] += 1
+            if session is not None:
+                session.cancel()
+            return
+        audio = sr.AudioData(b"".join(frames), self._reader.sample_rate, SAMPLE_WIDTH)
+        try:
+            self._queue.put_nowait(Utterance(audio, session, self._partial, self._muted_onset))
+            self.stats["utterances"] += 1
+        except queue.Full:
+            self.stats["dropped"] += 1
+
+    def _run(self):
+        preroll = collections.deque(maxlen=max(1, PREROLL_MS // self.frame_ms))
+        pause_frames = max(1, int(self.pause_threshold * 1000 / self.frame_ms))
+        frame_bytes = None
+        segment = None        # list of frames while inside an utterance
+        voiced = 0
+        silence = 0
+        onset = 0
+        barge = 0
+        barged = False        # this onset was let through by barge-in
+        try:
+            while self._running:
+                try:
+                    frame = self._reader.read()
+                except Exception as e:
+                    print("🎤 Mic read error:", e)
+                    time.sleep(0.05)
+                    continue
+                if frame_bytes is None:
+                    frame_bytes = self._reader.frame_samples * SAMPLE_WIDTH
+                if not frame or len(frame) < frame_bytes:
+                    break   # end of WAV source
+                self.stats["frames"] += 1
+                energy = frame_energy(frame)
+                speech = self._is_speech(frame, energy)
+
+                if segment is None:
+                    if speech and self.is_muted is not None and self.is_muted():
+                        # our own TTS: neither an onset nor part of the noise floor ...
+                        onset = 0
+                        self.stats["muted"] += 1
+                        if self._is_barge_in(energy):
+                            barge += 1
+                        else:
+                            barge = 0
+                            self._update_echo_level(energy)
+                        # ... unless the user is clearly talking over it
+                        if barge < BARGE_IN_FRAMES or not self.on_barge_in():
+                            preroll.append(frame)
+                            continue
+                        self.stats["barge_in"] += 1
+                        speech, onset, barged = True, ONSET_FRAMES - 1, True
+                    barge = 0
+                    if speech:
+                        onset += 1
+                    else:
+                        onset, barged = 0, False
+                        self._update_noise_floor(energy, NOISE_ALPHA)
+                    preroll.append(frame)
+                    if onset >= ONSET_FRAMES:
+                        segment = list(preroll)
+                        voiced, silence, onset = ONSET_FRAMES, 0, 0
+                        preroll.clear()
+                        # mute state as the utterance starts, not when it is transcribed
+                        self._muted_onset = not barged and self.is_muted is not None and self.is_muted()
+                        barged = False
+                        self._asr_start(segment)
+                    continue
+
+                segment.append(frame)
+                self._asr_feed(frame)
+                if speech:
+                    voiced += 1
+                    silence = 0
+                    self._update_noise_floor(energy, NOISE_ALPHA_SPEECH)
+                else:
+                    silence += 1
+                    self._update_noise_floor(energy, NOISE_ALPHA)
+                if silence >= pause_frames or len(segment) * self.frame_ms >= self.phrase_time_limit * 1000:
+                    self._emit(segment, voiced)
+                    segment = None
+            if segment is not None:
+                self._emit(segment, voiced)
+        finally:
+            self._reader.close()
+            self._running = False
+            self.finished.set()
+
+
+# ----------------------------------------------------------
+# 🎧 Shared stream
+# ----------------------------------------------------------
+_default_stream = None
+_default_lock = threading.Lock()
+
+
+def get_audio_stream():
+    """Process-wide microphone stream, opened on first use."""
+    global _default_stream
+    with _default_lock:
+        if _default_stream is None:
+            _default_stream = AudioStream().start()
+        return _default_stream
+
+
+def set_audio_stream(stream):
+    """Replace the shared stream (e.g. with AudioStream(wav_path=...))."""
+    global _default_stream
+    with _default_lock:
+        if _default_stream is not None and _default_stream is not stream:
+            _default_stream.stop()
+        _default_stream = stream
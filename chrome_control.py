@@ -34,23 +34,25 @@ def is_chrome_running():
 # 🚀 Open Chrome if not already running
 # ----------------------------------------------------------
 def open_chrome():
+    """Launch Chrome if needed; returns the Popen when this call started it."""
     try:
         if is_chrome_running():
-            return
+            return None
         chrome_paths = [
             r"C:\Program Files\Google\Chrome\Application\chrome.exe",
             r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe",
         ]
         for path in chrome_paths:
             if os.path.exists(path):
-                subprocess.Popen([path, "https://www.google.com"],
-                                 stdout=subprocess.DEVNULL,
-                                 stderr=subprocess.DEVNULL)
+                proc = subprocess.Popen([path, "https://www.google.com"],
+                                        stdout=subprocess.DEVNULL,
+                                        stderr=subprocess.DEVNULL)
                 time.sleep(1)
-                return
+                return proc
         webbrowser.open("https://www.google.com")
     except Exception as e:
         print("❌ open_chrome error:", e)
+    return None
 
 
 # ----------------------------------------------------------
@@ -83,19 +85,26 @@ def local_understand(text: str):
 # ----------------------------------------------------------
 # 🧩 Unified Auto-Search
 # ----------------------------------------------------------
-def auto_search(user_text: str):
+def auto_search(user_text: str, ctx=None):
     """
     Automatically understand and search (Gemini + local fallback).
+    If ctx (RequestContext) already carries a parsed intent, it is reused
+    and Gemini is not asked again.
     """
     if not user_text:
         return
 
     intent, query = None, None
 
+    if ctx is not None and ctx.intent:
+        intent, query = ctx.intent, ctx.query or user_text
+        if ctx.source == "router":
+            # the keyword router gives no search term, clean it up locally
+            query = local_understand(user_text)[1]
     # Try Gemini first
-    if gemini_ai:
+    elif gemini_ai:
         try:
-            ai_data = gemini_ai.get_gemini_json(user_text)
+            ai_data = gemini_ai.get_gemini_json(user_text, ctx=ctx)
             intent = ai_data.get("intent")
             query = ai_data.get("message_text") or user_text
         except Exception as e:
@@ -110,28 +119,32 @@ def auto_search(user_text: str):
     # Route automatically
     if intent in ("open_website", "website"):
         open_website(query)
-    elif intent == "youtube" or ("song" in user_text.lower() or "video" in user_text.lower()):
-        open_youtube(query)
+    elif intent in ("youtube", "youtube_search") or ("song" in user_text.lower() or "video" in user_text.lower()):
+        open_youtube(query, ctx=ctx)
     else:
-        open_google(query)
+        open_google(query, ctx=ctx)
 
 
 # ----------------------------------------------------------
 # 🔍 Google Search
 # ----------------------------------------------------------
-def open_google(query: str):
+def open_google(query: str, ctx=None):
     say(f"Google par {query} search kar raha hoon.")
     url = f"https://www.google.com/search?q={query.replace(' ', '+')}"
     ensure_chrome(url)
+    if ctx is not None:
+        ctx.mark("browser_open")
 
 
 # ----------------------------------------------------------
 # ▶️ YouTube Search
 # ----------------------------------------------------------
-def open_youtube(query: str):
+def open_youtube(query: str, ctx=None):
     say(f"YouTube par {query} dhoond raha hoon.")
     url = f"https://www.youtube.com/results?search_query={query.replace(' ', '+')}"
     ensure_chrome(url)
+    if ctx is not None:
+        ctx.mark("browser_open")
 
 
 # ----------------------------------------------------------
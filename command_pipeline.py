@@ -0,0 +1,151 @@
+# command_pipeline.py
+# ----------------------------------------------------------
+# Capture / dispatch pipeline for Chacha
+# - capture thread keeps listening and queues recognized text
+# - dispatcher thread runs commands one by one
+# - bounded queue with drop / merge policies + depth metrics
+# ----------------------------------------------------------
+
+import collections
+import threading
+import time
+
+# Queue policies when the queue is full
+DROP_OLDEST = "drop_oldest"   # forget the stalest command, keep the new one
+DROP_NEWEST = "drop_newest"   # keep what is queued, ignore the new one
+MERGE = "merge"               # glue the new text onto the last queued command
+
+# CONFIG
+QUEUE_MAXSIZE = 4
+QUEUE_POLICY = DROP_OLDEST
+
+
+class UtteranceQueue:
+    """Small bounded FIFO of recognized utterances."""
+
+    def __init__(self, maxsize=QUEUE_MAXSIZE, policy=QUEUE_POLICY):
+        if policy not in (DROP_OLDEST, DROP_NEWEST, MERGE):
+            raise ValueError(f"Unknown queue policy: {policy}")
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self._items = collections.deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self.stats = {"put": 0, "dropped": 0, "merged": 0, "max_depth": 0}
+
+    def put(self, text, ts=None):
+        """Queue text; returns False if it was dropped."""
+        item = (text, ts if ts is not None else time.time())
+        with self._cond:
+            if self._closed:
+                return False
+            self.stats["put"] += 1
+            if len(self._items) >= self.maxsize:
+                if self.policy == DROP_NEWEST:
+                    self.stats["dropped"] += 1
+                    return False
+                if self.policy == MERGE:
+                    last_text, last_ts = self._items.pop()
+                    item = (f"{last_text} {text}", last_ts)
+                    self.stats["merged"] += 1
+                else:
+                    self._items.popleft()
+                    self.stats["dropped"] += 1
+            self._items.append(item)
+            self.stats["max_depth"] = max(self.stats["max_depth"], len(self._items))
+            self._cond.notify()
+            return True
+
+    def get(self, timeout=None):
+        """Pop (text, ts); None on timeout or when closed and empty."""
+        with self._cond:
+            if not self._items and not self._closed:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+    def depth(self):
+        with self._cond:
+            return len(self._items)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class CommandPipeline:
+    """
+    listen_fn() -> text or "none"   (runs on the capture thread)
+    process_fn(text) -> "exit" to stop   (runs on the dispatcher thread)
+    Our own voice is filtered before listen_fn returns: AudioStream marks
+    utterances that start while Chacha speaks (Utterance.muted).
+    """
+
+    def __init__(self, listen_fn, process_fn, maxsize=QUEUE_MAXSIZE, policy=QUEUE_POLICY):
+        self.listen_fn = listen_fn
+        self.process_fn = process_fn
+        self.queue = UtteranceQueue(maxsize=maxsize, policy=policy)
+        self._stop = threading.Event()
+        self._capture_thread = None
+        self._dispatch_thread = None
+        self.stats = {"processed": 0, "errors": 0, "wait_total": 0.0}
+
+    def _capture_loop(self):
+        while not self._stop.is_set():
+            try:
+                text = self.listen_fn()
+            except Exception as e:
+                print("🎤 Capture error:", e)
+                time.sleep(0.2)
+                continue
+            if not text or text == "none":
+                continue
+            self.queue.put(text)
+            print(f"📥 Queued: {text} (depth {self.queue.depth()})")
+
+    def _dispatch_loop(self):
+        while not self._stop.is_set():
+            item = self.queue.get(timeout=0.5)
+            if item is None:
+                continue
+            text, ts = item
+            self.stats["wait_total"] += time.time() - ts
+            try:
+                result = self.process_fn(text)
+            except Exception as e:
+                self.stats["errors"] += 1
+                print("⚠️ Command error:", e)
+                continue
+            self.stats["processed"] += 1
+            if result == "exit":
+                self.stop()
+
+    def start(self):
+        self._capture_thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self._dispatch_thread = threading.Thread(target=self._dispatch_loop, daemon=True)
+        self._capture_thread.start()
+        self._dispatch_thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self.queue.close()
+
+    def wait(self):
+        """Block until a command returns "exit" (Ctrl+C also stops)."""
+        try:
+            while not self._stop.is_set():
+                self._stop.wait(0.5)
+        except KeyboardInterrupt:
+            self.stop()
+
+    def metrics(self):
+        processed = self.stats["processed"] or 1
+        return {
+            "queue_depth": self.queue.depth(),
+            "avg_queue_wait": self.stats["wait_total"] / processed,
+            **self.stats,
+            **{f"queue_{k}": v for k, v in self.queue.stats.items()},
+        }
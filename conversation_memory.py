@@ -0,0 +1,152 @@
+# conversation_memory.py
+# ----------------------------------------------------------
+# Bounded conversation memory for Gemini chat
+# - the last RECENT_TURNS turns are kept verbatim in a ring buffer
+#   (deque append is O(1), each turn is capped at TURN_MAX_TOKENS)
+# - turns pushed out of the ring are folded into a rolling summary
+#   on a background thread, off the hot path
+# - context() never exceeds BUDGET_TOKENS, so the prompt stays flat
+#   however long the session runs
+# - prompt tokens of every chat turn are logged for export
+# ----------------------------------------------------------
+
+import queue
+import threading
+from collections import deque
+
+BUDGET_TOKENS = 700         # summary + recent turns sent with each chat prompt
+RECENT_TURNS = 6            # user + Chacha turns kept verbatim (3 exchanges)
+TURN_MAX_TOKENS = 120       # a longer turn is cut before it is stored
+SUMMARY_TOKENS = 200        # rolling summary cap
+FOLD_BATCH = 2              # evicted turns folded per summarize() call
+PROMPT_LOG_SIZE = 1000      # per-turn prompt token counts kept for export
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) for budgeting without an API call."""
+    return (len(text) + 3) // 4
+
+
+def clip_tokens(text: str, tokens: int, keep="head") -> str:
+    """Cut text to about `tokens` tokens, keeping its head or its tail."""
+    limit = tokens * 4
+    if len(text) <= limit:
+        return text
+    return text[:limit].rstrip() + " …" if keep == "head" else "… " + text[-limit:].lstrip()
+
+
+class ConversationMemory:
+    """
+    summarize(summary, turns_text) -> new summary text; it runs on the
+    fold thread. Without one (or when it fails) older turns are appended
+    to the summary and only its most recent SUMMARY_TOKENS are kept.
+    """
+
+    def __init__(self, summarize=None, budget_tokens=BUDGET_TOKENS, recent_turns=RECENT_TURNS,
+                 turn_tokens=TURN_MAX_TOKENS, summary_tokens=SUMMARY_TOKENS):
+        self._summarize = summarize
+        self.budget_tokens = budget_tokens
+        self.turn_tokens = turn_tokens
+        self.summary_tokens = summary_tokens
+        self.turns = deque(maxlen=recent_turns)     # (role, text, tokens)
+        self.summary = ""
+        self.prompt_log = deque(maxlen=PROMPT_LOG_SIZE)
+        self._lock = threading.Lock()
+        self._evicted = queue.Queue()
+        self._thread = None
+        self.stats = {"turns": 0, "folds": 0, "fold_errors": 0, "dropped_from_prompt": 0}
+
+    # ------------------------------------------------------
+    def add(self, role: str, text: str):
+        text = clip_tokens(" ".join((text or "").split()), self.turn_tokens)
+        if not text:
+            return
+        with self._lock:
+            if len(self.turns) == self.turns.maxlen:
+                self._evicted.put(self.turns[0])
+                self._start_folding()
+            self.turns.append((role, text, estimate_tokens(text)))
+            self.stats["turns"] += 1
+
+    def add_exchange(self, user_text: str, reply: str):
+        self.add("User", user_text)
+        self.add("Chacha", reply)
+
+    def clear(self):
+        with self._lock:
+            self.turns.clear()
+            self.summary = ""
+
+    # ------------------------------------------------------
+    def context(self) -> str:
+        """Summary + recent turns as prompt text ('' when empty), within budget_tokens."""
+        with self._lock:
+            summary = self.summary
+            turns = list(self.turns)
+        used = estimate_tokens(summary)
+        lines = []
+        for role, text, tokens in reversed(turns):
+            if used + tokens > self.budget_tokens:
+                self.stats["dropped_from_prompt"] += 1
+                break
+            lines.append(f"{role}: {text}")
+            used += tokens
+        if not summary and not lines:
+            return ""
+        parts = ["Conversation so far:"]
+        if summary:
+            parts.append(f"(Earlier: {summary})")
+        parts.extend(reversed(lines))
+        return "\n".join(parts) + "\n"
+
+    def __len__(self):
+        return len(self.turns)
+
+    def record_prompt(self, tokens: int):
+        """Log the prompt token count of one chat turn."""
+        self.prompt_log.append(tokens)
+
+    def metrics(self):
+        log = self.prompt_log
+        return {"turns": self.stats["turns"], "kept": len(self.turns), "folds": self.stats["folds"],
+                "summary_tokens": estimate_tokens(self.summary),
+                "last_prompt_tokens": log[-1] if log else 0,
+                "avg_prompt_tokens": sum(log) / len(log) if log else 0.0,
+                "max_prompt_tokens": max(log) if log else 0}
+
+    def export_prompt_tokens(self, path):
+        """Write the per-turn prompt token counts as CSV (turn,prompt_tokens)."""
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("turn,prompt_tokens\n")
+            for i, tokens in enumerate(self.prompt_log, 1):
+                f.write(f"{i},{tokens}\n")
+
+    # ------------------------------------------------------
+    def _start_folding(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._fold_loop, name="memory-fold", daemon=True)
+            self._thread.start()
+
+    def _fold_loop(self):
+        while True:
+            batch = [self._evicted.get()]
+            while len(batch) < FOLD_BATCH:
+                try:
+                    batch.append(self._evicted.get(timeout=1.0))
+                except queue.Empty:
+                    break
+            turns_text = "\n".join(f"{role}: {text}" for role, text, _ in batch)
+            with self._lock:
+                summary = self.summary
+            new = None
+            if self._summarize is not None:
+                try:
+                    new = (self._summarize(summary, turns_text) or "").strip()
+                except Exception as e:
+                    self.stats["fold_errors"] += 1
+                    print("⚠️ Conversation summary failed:", e)
+            if not new:
+                new = f"{summary} {turns_text}".strip()
+            with self._lock:
+                self.summary = clip_tokens(" ".join(new.split()), self.summary_tokens, keep="tail")
+                self.stats["folds"] += 1
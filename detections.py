@@ -0,0 +1,196 @@
+# detections.py
+# ----------------------------------------------------------
+# Columnar YOLO detections for Chacha (NumPy only)
+# - Detections: boxes (N, 4) xyxy, scores (N,), classes (N,)
+#   filled from a YOLO result with one tensor → array conversion
+# - vectorized IoU + class-aware NMS for the multi-scale merge
+# - IoU-based fusion of the same object across frames
+# - dicts are only built at the API boundary (to_dicts)
+#   python detections.py --bench   → micro-benchmark vs the old loops
+# ----------------------------------------------------------
+
+import numpy as np
+
+NMS_IOU = 0.45          # same object seen at two scales
+FRAME_FUSE_IOU = 0.5    # same object in two frames (it may move a little)
+
+
+class Detections:
+    """boxes (N, 4) float32 xyxy, scores (N,) float32, classes (N,) int64; names = {class id: label}."""
+
+    __slots__ = ("boxes", "scores", "classes", "names")
+
+    def __init__(self, boxes=None, scores=None, classes=None, names=None):
+        self.boxes = np.asarray(boxes if boxes is not None else (), dtype=np.float32).reshape(-1, 4)
+        self.scores = np.asarray(scores if scores is not None else (), dtype=np.float32).reshape(-1)
+        self.classes = np.asarray(classes if classes is not None else (), dtype=np.int64).reshape(-1)
+        self.names = names or {}
+
+    @classmethod
+    def from_result(cls, r):
+        """From an ultralytics Result: boxes.data is [x1, y1, x2, y2, (track id,) conf, cls]."""
+        names = dict(getattr(r, "names", None) or {})
+        boxes = getattr(r, "boxes", None)
+        if boxes is None or len(boxes) == 0:
+            return cls(names=names)
+        data = boxes.data
+        data = data.cpu().numpy() if hasattr(data, "cpu") else np.asarray(data)
+        return cls(data[:, :4], data[:, -2], data[:, -1], names)
+
+    @classmethod
+    def concat(cls, parts):
+        parts = list(parts)
+        names = {}
+        for p in parts:
+            names.update(p.names)
+        if not parts:
+            return cls()
+        return cls(np.concatenate([p.boxes for p in parts]), np.concatenate([p.scores for p in parts]),
+                   np.concatenate([p.classes for p in parts]), names)
+
+    def __len__(self):
+        return len(self.scores)
+
+    def take(self, idx):
+        return Detections(self.boxes[idx], self.scores[idx], self.classes[idx], self.names)
+
+    def scaled(self, factor):
+        """Boxes divided by factor (e.g. back from an upscaled image)."""
+        return Detections(self.boxes / factor, self.scores, self.classes, self.names)
+
+    def nms(self, iou_threshold=NMS_IOU):
+        """Class-aware NMS; the result is sorted by score, highest first."""
+        return self.take(nms(self.boxes, self.scores, self.classes, iou_threshold))
+
+    def to_dicts(self):
+        """[{"name", "conf", "bbox" (int xyxy), "area"}] for the handlers."""
+        ints = self.boxes.astype(np.int64)
+        areas = np.maximum(1, (ints[:, 2] - ints[:, 0]) * (ints[:, 3] - ints[:, 1]))
+        return [{"name": self.names.get(int(c), str(int(c))), "conf": float(s),
+                 "bbox": tuple(int(v) for v in box), "area": int(a)}
+                for box, s, c, a in zip(ints, self.scores, self.classes, areas)]
+
+
+def box_iou(a, b):
+    """IoU matrix (N, M) of xyxy boxes a (N, 4) and b (M, 4)."""
+    area_a = (a[:, 2] - a[:, 0]).clip(0) * (a[:, 3] - a[:, 1]).clip(0)
+    area_b = (b[:, 2] - b[:, 0]).clip(0) * (b[:, 3] - b[:, 1]).clip(0)
+    lt = np.maximum(a[:, None, :2], b[None, :, :2])
+    rb = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    wh = (rb - lt).clip(0)
+    inter = wh[..., 0] * wh[..., 1]
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.where(union > 0, union, 1), 0.0)
+
+
+def nms(boxes, scores, classes=None, iou_threshold=NMS_IOU):
+    """
+    Indices kept by greedy NMS, highest score first. With classes, boxes
+    of different classes never suppress each other (coordinate offset trick).
+    """
+    if len(scores) == 0:
+        return np.zeros(0, dtype=np.int64)
+    if classes is not None:
+        boxes = boxes + (classes.astype(np.float32) * (float(boxes.max()) + 1.0))[:, None]
+    order = np.argsort(-scores, kind="stable")
+    sorted_boxes = boxes[order]
+    overlaps = box_iou(sorted_boxes, sorted_boxes) > iou_threshold    # one (N, N) pass
+    removed = np.zeros(len(order), dtype=bool)
+    keep = []
+    for i in range(len(order)):
+        if removed[i]:
+            continue
+        keep.append(i)
+        removed |= overlaps[i]
+    return order[np.asarray(keep, dtype=np.int64)]
+
+
+def merge_scales(native, upscaled, factor, iou_threshold=NMS_IOU):
+    """Detections of one frame at two scales → one set (upscaled boxes mapped back)."""
+    return Detections.concat([native, upscaled.scaled(factor)]).nms(iou_threshold)
+
+
+def fuse_frames(per_frame, iou_threshold=FRAME_FUSE_IOU):
+    """The same object seen in several frames is kept once, with its best score."""
+    return Detections.concat(per_frame).nms(iou_threshold)
+
+
+# ----------------------------------------------------------
+# 🧪 Micro-benchmark: per-box Python loops vs columnar NumPy
+# ----------------------------------------------------------
+class _Box:
+    """What iterating ultralytics Boxes yields: 1-row conf / cls / xyxy."""
+
+    def __init__(self, row):
+        self.conf = row[4:5]
+        self.cls = row[5:6]
+        self.xyxy = row[None, :4]
+
+
+def _random_result(n, rng, num_classes=10, size=1280):
+    xy = rng.uniform(0, size - 80, (n, 2))
+    wh = rng.uniform(10, 80, (n, 2))
+    data = np.column_stack([xy, xy + wh, rng.uniform(0.2, 1.0, n), rng.integers(0, num_classes, n)])
+    return data.astype(np.float32)
+
+
+def _legacy(data):
+    """The old path: per-box extraction into dicts + O(n²) Python IoU dedupe."""
+    results = []
+    for b in (_Box(row) for row in data):
+        x1, y1, x2, y2 = map(int, b.xyxy[0].tolist())
+        results.append({"name": str(int(b.cls[0])), "conf": float(b.conf[0]),
+                        "bbox": (x1, y1, x2, y2), "area": max(1, (x2 - x1) * (y2 - y1))})
+    merged = []
+    for d in sorted(results, key=lambda x: -x["conf"]):
+        x1, y1, x2, y2 = d["bbox"]
+        keep = True
+        for m in merged:
+            mx1, my1, mx2, my2 = m["bbox"]
+            iw = max(0, min(x2, mx2) - max(x1, mx1))
+            ih = max(0, min(y2, my2) - max(y1, my1))
+            inter = iw * ih
+            union = d["area"] + m["area"] - inter
+            if union > 0 and inter / union > NMS_IOU:
+                keep = False
+                break
+        if keep:
+            merged.append(d)
+    return merged
+
+
+def _bench(sizes=(100, 300, 1000), rounds=20):
+    import time
+
+    rng = np.random.default_rng(0)
+    print(f"{'boxes':>6} | {'python loops':>12} | {'numpy':>9} | speed-up | kept (py / np)")
+    for n in sizes:
+        data = _random_result(n, rng)
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            old = _legacy(data)
+        t_old = (time.perf_counter() - t0) / rounds
+        t0 = time.perf_counter()
+        for _ in range(rounds):
+            new = Detections(data[:, :4], data[:, 4], data[:, 5]).nms().to_dicts()
+        t_new = (time.perf_counter() - t0) / rounds
+        print(f"{n:>6} | {t_old * 1000:9.2f} ms | {t_new * 1000:6.2f} ms | {t_old / t_new:7.1f}x | "
+              f"{len(old)} / {len(new)} (numpy is class-aware)")
+    frames = [Detections(d[:, :4], d[:, 4], d[:, 5]) for d in (_random_result(300, rng) for _ in range(3))]
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        fused = fuse_frames(frames)
+    print(f"fuse 3 frames x 300 boxes: {(time.perf_counter() - t0) / rounds * 1000:.2f} ms → {len(fused)} kept")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Columnar detection post-processing")
+    parser.add_argument("--bench", action="store_true", help="micro-benchmark vs the per-box Python loops")
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+    if args.bench:
+        _bench(rounds=args.rounds)
+    else:
+        parser.print_help()
@@ -7,21 +7,87 @@
 import google.generativeai as genai
 import json
 import os
+import random
+import threading
 import time
 import re
-from voice import say
+from types import SimpleNamespace
+from voice import say, on_barge_in, CHAT
+from intent_cache import IntentCache
+import intent_classifier
+from conversation_memory import ConversationMemory, estimate_tokens
+from gemini_client import GeminiClient
+
+
+# ----------------------------------------------------------
+# 🧪 Fake model (offline, deterministic)
+# ----------------------------------------------------------
+class FakeModel:
+    """
+    Stand-in for genai.GenerativeModel: replies with `reply` (or `json_reply`
+    for JSON requests), streamed word by word after `ttft` seconds.
+    A large ttft reproduces a slow service; fail_rate (0..1) of the calls
+    raise ConnectionError after the delay, like a flaky network.
+    """
+
+    def __init__(self, reply="Namaste beta! Chacha yahan hai. Batao, aaj kya madad karun?",
+                 json_reply='{"intent": "chat", "contact_name": null, "message_text": null, '
+                            '"reply": "Main badhiya hoon beta, aap batao?"}',
+                 ttft=0.4, tokens_per_second=25.0, fail_rate=0.0):
+        self.reply = reply
+        self.json_reply = json_reply
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.fail_rate = fail_rate
+        self.calls = 0
+
+    def _maybe_fail(self):
+        if random.random() < self.fail_rate:
+            raise ConnectionError("fake Gemini: connection reset")
+
+    def generate_content(self, prompt, generation_config=None, stream=False, request_options=None):
+        self.calls += 1
+        if (generation_config or {}).get("response_mime_type") == "application/json":
+            time.sleep(self.ttft)
+            self._maybe_fail()
+            usage = SimpleNamespace(prompt_token_count=len(str(prompt).split()),
+                                    candidates_token_count=len(self.json_reply.split()),
+                                    cached_content_token_count=0)
+            return SimpleNamespace(text=self.json_reply, usage_metadata=usage)
+        if not stream:
+            time.sleep(self.ttft + len(self.reply.split()) / self.tokens_per_second)
+            self._maybe_fail()
+            return SimpleNamespace(text=self.reply)
+        return self._stream()
+
+    def _stream(self):
+        time.sleep(self.ttft)
+        self._maybe_fail()
+        for i, word in enumerate(self.reply.split(" ")):
+            if i:
+                time.sleep(1 / self.tokens_per_second)
+            yield SimpleNamespace(text=word if i == 0 else " " + word)
 
 
 # ----------------------------------------------------------
 # API CONFIG
 # ----------------------------------------------------------
 API_KEY = os.environ.get("GEMINI_API_KEY")
-if not API_KEY:
+GEMINI_MODEL = "gemini-2.5-flash"
+if os.environ.get("CHACHA_GEMINI") == "fake":
+    print("🧪 Using the fake Gemini model (CHACHA_GEMINI=fake).")
+    model = FakeModel(ttft=float(os.environ.get("CHACHA_FAKE_TTFT", "0.4")),
+                      fail_rate=float(os.environ.get("CHACHA_FAKE_FAIL_RATE", "0")))
+elif not API_KEY:
     print("❌ GEMINI_API_KEY not found in environment.")
+    model = None
 else:
     genai.configure(api_key=API_KEY)
-    print("✅ Gemini AI configured successfully with gemini-2.5-flash.")
-model = genai.GenerativeModel("gemini-2.5-flash") if API_KEY else None
+    print(f"✅ Gemini AI configured successfully with {GEMINI_MODEL}.")
+    model = genai.GenerativeModel(GEMINI_MODEL)
+
+# deadlines, retries, circuit breaker and single flight for every call
+client = GeminiClient()
 
 
 # ----------------------------------------------------------
@@ -56,69 +122,380 @@ Rules:
 Return ONLY valid JSON, nothing else.
 """
 
+# Combined mode: chat utterances come back with their spoken reply,
+# so the common chat path needs one Gemini round trip instead of two
+COMBINED_REPLY = os.environ.get("CHACHA_COMBINED_REPLY", "1") != "0"
+REPLY_INSTRUCTION = """
+Also include the key "reply":
+- if intent is "chat": Chacha's own spoken answer to the user — natural, friendly, short
+  (Hindi/English/Hinglish, matching the user's tone)
+- for every other intent: null
+"""
+
+
+# ----------------------------------------------------------
+# INTENT MODEL (system instruction + response schema)
+# ----------------------------------------------------------
+# The instruction is the model's system instruction, so each request only
+# sends the utterance and the stable prefix can be cached by Gemini
+# (implicitly, or explicitly with CHACHA_GEMINI_CONTEXT_CACHE=1 when the
+# instruction is long enough for the API's explicit cache).
+CONTEXT_CACHE = os.environ.get("CHACHA_GEMINI_CONTEXT_CACHE") == "1"
+CONTEXT_CACHE_TTL = 3600            # seconds
+CONTEXT_CACHE_MIN_TOKENS = 1024     # explicit caches below this are rejected by the API
+
+INTENT_ENUM = intent_classifier.INTENT_LABELS + ["set_volume"]
+
+
+def intent_schema(with_reply=COMBINED_REPLY):
+    """response_schema for get_gemini_json: the intent is one of INTENT_ENUM."""
+    properties = {
+        "intent": {"type": "string", "format": "enum", "enum": INTENT_ENUM},
+        "contact_name": {"type": "string", "nullable": True},
+        "message_text": {"type": "string", "nullable": True},
+    }
+    if with_reply:
+        properties["reply"] = {"type": "string", "nullable": True}
+    return {"type": "object", "properties": properties, "required": ["intent"]}
+
+
+_intent_model = None
+_intent_model_lock = threading.Lock()
+
+
+def intent_model():
+    """The classification model, built on first use (the fake model is used as is)."""
+    global _intent_model
+    with _intent_model_lock:
+        if _intent_model is None:
+            _intent_model = model if isinstance(model, FakeModel) else _build_intent_model()
+    return _intent_model
+
+
+def _build_intent_model():
+    instruction = SYSTEM_INSTRUCTION + REPLY_INSTRUCTION if COMBINED_REPLY else SYSTEM_INSTRUCTION
+    if CONTEXT_CACHE:
+        try:
+            from google.generativeai import caching
+            import datetime
+            tokens = model.count_tokens(instruction).total_tokens
+            if tokens >= CONTEXT_CACHE_MIN_TOKENS:
+                cached = caching.CachedContent.create(
+                    model=f"models/{GEMINI_MODEL}", display_name="chacha-intent",
+                    system_instruction=instruction, ttl=datetime.timedelta(seconds=CONTEXT_CACHE_TTL))
+                print(f"🗃️ Intent instruction ({tokens} tokens) in Gemini context cache.")
+                return genai.GenerativeModel.from_cached_content(cached)
+            print(f"ℹ️ Intent instruction is {tokens} tokens (< {CONTEXT_CACHE_MIN_TOKENS}): "
+                  f"relying on implicit prefix caching.")
+        except Exception as e:
+            print("⚠️ Gemini context cache unavailable:", e)
+    return genai.GenerativeModel(GEMINI_MODEL, system_instruction=instruction)
+
+
+# ----------------------------------------------------------
+# INTENT CACHE (memory LRU + SQLite, with TTL: intent_cache.py)
+# ----------------------------------------------------------
+intent_cache = IntentCache()
+
+# request counters (json_calls = real Gemini classification round trips)
+# (combined_replies = chat replies that came with the classification,
+#  round_trips_saved = of those, the ones spoken without a second call)
+stats = {"json_calls": 0, "local_hits": 0, "combined_replies": 0, "round_trips_saved": 0,
+         "prompt_tokens": 0, "cached_tokens": 0, "output_tokens": 0, "json_time": 0.0}
+
 
 # ----------------------------------------------------------
 # GENERATE JSON INTENT
 # ----------------------------------------------------------
-def get_gemini_json(user_text: str):
-    """Extracts intent and target text from user input."""
+def get_gemini_json(user_text: str, ctx=None, use_local=True, use_cache=True):
+    """
+    Extracts intent and target text from user input.
+    Pass the utterance's RequestContext as ctx: the result is stored on
+    it and the call is counted, so handlers can reuse it instead of
+    classifying the same text again.
+    use_local=False skips the offline classifier and use_cache=False the
+    intent cache (both e.g. to label data with Gemini's own answer).
+    """
+    if ctx is not None:
+        ctx.count_nlu()
+        with ctx.timed("nlu"):
+            result, source = _classify(user_text, use_local, use_cache)
+        ctx.set_intent(result, source)
+        return result
+    return _classify(user_text, use_local, use_cache)[0]
+
+
+def _classify(user_text: str, use_local=True, use_cache=True):
+    """Returns (result, source) where source is cache / local / gemini / fallback / offline."""
     if not model:
-        return {"intent": "chat", "contact_name": None, "message_text": user_text}
+        local = intent_classifier.guess(user_text, allowed=intent_classifier.FALLBACK_INTENTS) if use_local else None
+        return local or {"intent": "chat", "contact_name": None, "message_text": user_text}, "offline"
+
+    cached = intent_cache.get(user_text) if use_cache else None
+    if cached is not None:
+        print("⚡ Intent cache hit:", cached.get("intent"))
+        return cached, "cache"
+
+    local = intent_classifier.guess(user_text) if use_local else None
+    if local is not None:
+        stats["local_hits"] += 1
+        return local, "local"
 
-    prompt = f"{SYSTEM_INSTRUCTION}\nUser said: {user_text}"
+    # in combined mode the reply may refer back to the conversation
+    history = memory.context() if COMBINED_REPLY else ""
     try:
-        response = model.generate_content(
-            prompt,
-            generation_config={"response_mime_type": "application/json"},
+        stats["json_calls"] += 1
+        t0 = time.perf_counter()
+        response = client.generate(
+            intent_model(), f"{history}User said: {user_text}",
+            generation_config={"response_mime_type": "application/json",
+                               "response_schema": intent_schema()},
         )
+        prompt_tokens = _record_usage(response, time.perf_counter() - t0)
         text = getattr(response, "text", "").strip()
         print("📜 Gemini raw JSON:", text)
-        # inside get_gemini_json(), before json.loads(text)
-        json_text = re.search(r"\{.*\}", text, re.DOTALL)
-        if json_text:
-            text = json_text.group(0)
         data = json.loads(text)
-        return {
+        result = {
             "intent": data.get("intent", "chat"),
             "contact_name": data.get("contact_name"),
             "message_text": data.get("message_text"),
         }
+        # replies are never cached: a repeated question deserves a fresh answer
+        if use_cache:
+            intent_cache.put(user_text, result)
+        reply = data.get("reply") if COMBINED_REPLY and result["intent"] == "chat" else None
+        if isinstance(reply, str) and reply.strip():
+            result["reply"] = reply.strip()
+            stats["combined_replies"] += 1
+            memory.record_prompt(prompt_tokens)
+        return result, "gemini"
     except Exception as e:
-        print("❌ Gemini JSON parse error:", e)
+        print("❌ Gemini JSON error:", e)
+        local = intent_classifier.guess(user_text, allowed=intent_classifier.FALLBACK_INTENTS) if use_local else None
+        if local is not None:
+            return local, "fallback"
         # fallback simple keyword-based understanding
         low = user_text.lower()
         if "open" in low or "start" in low:
-            return {"intent": "open_app", "contact_name": None, "message_text": user_text}
+            return {"intent": "open_app", "contact_name": None, "message_text": user_text}, "fallback"
         if "search" in low or "google" in low or "youtube" in low:
-            return {"intent": "search", "contact_name": None, "message_text": user_text}
+            return {"intent": "search", "contact_name": None, "message_text": user_text}, "fallback"
         if "music" in low or "song" in low or "play" in low:
-            return {"intent": "play_music", "contact_name": None, "message_text": user_text}
-        return {"intent": "chat", "contact_name": None, "message_text": user_text}
+            return {"intent": "play_music", "contact_name": None, "message_text": user_text}, "fallback"
+        return {"intent": "chat", "contact_name": None, "message_text": user_text}, "fallback"
+
+
+def _record_usage(response, seconds):
+    usage = getattr(response, "usage_metadata", None)
+    prompt_tokens = getattr(usage, "prompt_token_count", 0) or 0
+    cached_tokens = getattr(usage, "cached_content_token_count", 0) or 0
+    output_tokens = getattr(usage, "candidates_token_count", 0) or 0
+    stats["prompt_tokens"] += prompt_tokens
+    stats["cached_tokens"] += cached_tokens
+    stats["output_tokens"] += output_tokens
+    stats["json_time"] += seconds
+    print(f"📏 Intent call: {seconds * 1000:.0f} ms | tokens in {prompt_tokens} "
+          f"(cached {cached_tokens}) out {output_tokens}")
+    return prompt_tokens
+
+
+def json_metrics():
+    """Average latency and token counts per Gemini classification request."""
+    n = stats["json_calls"] or 1
+    return {"json_calls": stats["json_calls"], "avg_json_time": stats["json_time"] / n,
+            "avg_prompt_tokens": stats["prompt_tokens"] / n, "avg_cached_tokens": stats["cached_tokens"] / n,
+            "avg_output_tokens": stats["output_tokens"] / n}
 
 
 # ----------------------------------------------------------
 # NATURAL CHAT RESPONSE
 # ----------------------------------------------------------
-def get_gemini_response(prompt, speak=True):
-    """Generate Chacha-style friendly conversational response."""
+CHAT_PROMPT = ("You are Chacha, a friendly voice assistant. "
+               "Understand tone (Hindi/English/Hinglish) and reply naturally, friendly, short.\n"
+               "{history}User said: {prompt}")
+SUMMARY_PROMPT = ("Summarize this conversation between a user and the voice assistant Chacha in at most "
+                  "60 words. Keep names, topics and facts the user may refer back to.\n"
+                  "Summary so far: {summary}\nNew turns:\n{turns}")
+SPEAK_MIN_CHARS = 20    # a finished sentence shorter than this waits for the next one
+
+# streaming counters (tokens = Gemini's count when reported, else words)
+stream_stats = {"streams": 0, "first_tokens": 0, "cancelled": 0, "errors": 0,
+                "ttft": 0.0, "tokens": 0, "gen_time": 0.0}
+
+_SENTENCE_END = re.compile(r"[.!?।॥]+[\"')\]]*\s+")
+
+
+def _chunk_text(chunk):
+    try:
+        return chunk.text or ""
+    except ValueError:      # a chunk without text parts (e.g. safety metadata)
+        return ""
+
+
+def _summarize(summary, turns):
+    """Fold older turns into the rolling summary (runs on the memory's own thread)."""
+    if not model:
+        return None
+    response = client.generate(model, SUMMARY_PROMPT.format(summary=summary or "-", turns=turns),
+                               generation_config={"temperature": 0.2, "max_output_tokens": 120})
+    return getattr(response, "text", "")
+
+
+memory = ConversationMemory(summarize=_summarize)
+
+
+def get_gemini_response_stream(prompt, cancel=None, remember=True):
+    """
+    Yield Chacha's chat reply as text deltas while Gemini generates it.
+    cancel (threading.Event): once set, generation stops before the next delta.
+    remember: send the conversation memory along and store this exchange in it.
+    """
+    if not model:
+        raise RuntimeError("Gemini is not configured")
+    t0 = time.perf_counter()
+    first = None
+    words = 0
+    usage = None
+    parts = []
+    stream_stats["streams"] += 1
+    full_prompt = CHAT_PROMPT.format(history=memory.context() if remember else "", prompt=prompt)
+    response = None
+    try:
+        response = client.stream(model, full_prompt, generation_config={"temperature": 0.7})
+        for chunk in response:
+            if cancel is not None and cancel.is_set():
+                stream_stats["cancelled"] += 1
+                print("✋ Gemini stream cancelled.")
+                break
+            usage = getattr(chunk, "usage_metadata", None) or usage
+            text = _chunk_text(chunk)
+            if not text:
+                continue
+            if first is None:
+                first = time.perf_counter()
+                stream_stats["first_tokens"] += 1
+                stream_stats["ttft"] += first - t0
+            words += len(text.split())
+            parts.append(text)
+            yield text
+    except Exception:
+        stream_stats["errors"] += 1
+        raise
+    finally:
+        if response is not None:
+            response.close()
+        stream_stats["tokens"] += getattr(usage, "candidates_token_count", None) or words
+        if first is not None:
+            stream_stats["gen_time"] += time.perf_counter() - first
+        if remember:
+            memory.record_prompt(getattr(usage, "prompt_token_count", None) or estimate_tokens(full_prompt))
+            if parts:
+                memory.add_exchange(prompt, "".join(parts))
+
+
+def stream_metrics():
+    """Average time to first token and generation speed over all streamed replies."""
+    s = stream_stats
+    return {"streams": s["streams"], "cancelled": s["cancelled"], "errors": s["errors"],
+            "avg_ttft": s["ttft"] / (s["first_tokens"] or 1),
+            "tokens_per_second": s["tokens"] / s["gen_time"] if s["gen_time"] else 0.0}
+
+
+def _pop_sentences(pending):
+    """(finished text worth speaking now, rest) of the reply streamed so far."""
+    end = 0
+    for m in _SENTENCE_END.finditer(pending):
+        if m.end() >= SPEAK_MIN_CHARS:
+            end = m.end()
+    return pending[:end].strip(), pending[end:]
+
+
+def get_gemini_text(prompt, deadline=None):
+    """
+    One-shot reply text for prompt (no speech, no memory) or None.
+    Identical prompts in flight at the same time share one Gemini call.
+    """
+    if not model:
+        return None
+    try:
+        response = client.generate(model, CHAT_PROMPT.format(history="", prompt=prompt), deadline=deadline,
+                                   generation_config={"temperature": 0.7})
+        return getattr(response, "text", "").strip() or None
+    except Exception as e:
+        print("❌ Gemini error:", e)
+        return None
+
+
+def speak_reply(user_text, text):
+    """Speak a chat reply that came with the classification (no second Gemini call)."""
+    stats["round_trips_saved"] += 1
+    memory.add_exchange(user_text, text)
+    print("🧠 Gemini says (combined):", text)
+    say(text, priority=CHAT)
+    return text
+
+
+def get_gemini_response(prompt, speak=True, remember=True):
+    """
+    Generate Chacha-style friendly conversational response.
+    With speak=True every finished sentence is queued for speech while the
+    rest is still generating; barge-in stops both speech and generation, and
+    so does a higher-priority message cutting in (the rest of the reply is dropped).
+    remember=False keeps one-off prompts out of the conversation memory.
+    """
     if not model:
         say("Sorry, I’m not connected to Gemini right now.")
         return "error"
 
+    cancel = threading.Event()
+    reply = object()
+    handles = []
+
+    def stop():
+        cancel.set()
+        for handle in handles:
+            handle.cancel("barge-in")
+
+    remove_listener = on_barge_in(stop) if speak else None
+    parts = []
+    pending = ""
     try:
-        response = model.generate_content(
-            f"You are Chacha, a friendly voice assistant. "
-            f"Understand tone (Hindi/English/Hinglish) and reply naturally, friendly, short.\nUser said: {prompt}",
-            generation_config={"temperature": 0.7},
-        )
-        text = getattr(response, "text", "").strip()
+        for delta in get_gemini_response_stream(prompt, cancel=cancel, remember=remember):
+            parts.append(delta)
+            if speak:
+                ready, pending = _pop_sentences(pending + delta)
+                if ready:
+                    handles.append(say(ready, priority=CHAT, reply=reply))
+                    if handles[-1].cancelled == "preempted":
+                        cancel.set()
+        text = "".join(parts).strip()
         if not text:
             text = "Sorry, I couldn’t understand that."
+            pending = text
         print("🧠 Gemini says:", text)
-        if speak:
-            say(text)
+        if speak and not cancel.is_set():
+            say(pending, priority=CHAT, reply=reply)
         return text
     except Exception as e:
         print("❌ Gemini error:", e)
-        say("Something went wrong with AI response.")
-        return "error"
+        if not handles:
+            say("Something went wrong with AI response.")
+        return "".join(parts).strip() or "error"
+    finally:
+        if remove_listener is not None:
+            remove_listener()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Chacha Gemini chat")
+    parser.add_argument("prompt", nargs="?", default="Chacha, aaj ka din kaisa hai?")
+    parser.add_argument("--fake", action="store_true", help="use the offline FakeModel")
+    args = parser.parse_args()
+    if args.fake:
+        model = FakeModel()
+    for delta in get_gemini_response_stream(args.prompt):
+        print(delta, end="", flush=True)
+    print()
+    print("📊 Stream:", stream_metrics())
@@ -0,0 +1,198 @@
+# gemini_client.py
+# ----------------------------------------------------------
+# Resilient calls to Gemini for Chacha
+# - every call has a deadline; attempts that fail with a transient
+#   error are retried with jittered exponential backoff inside it
+# - circuit breaker (tts_health.BackendHealth): after MAX_FAILURES
+#   failed calls in a row Gemini is skipped for COOLDOWN seconds and
+#   callers fall back to local answers at once
+# - identical in-flight requests share one call (single flight)
+# - streams: deadline for the first chunk and between chunks
+# ----------------------------------------------------------
+
+import json
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from tts_health import BackendHealth
+
+DEADLINE = 6.0              # seconds for a whole generate() call, retries included
+FIRST_CHUNK_DEADLINE = 8.0  # stream: until the first chunk
+CHUNK_DEADLINE = 10.0       # stream: between two chunks
+RETRIES = 2                 # extra attempts after a transient failure
+BACKOFF = 0.25              # first retry delay, doubled per attempt, ±50% jitter
+MAX_FAILURES = 3
+COOLDOWN = 30.0
+MAX_WORKERS = 8
+
+# google.api_core exception names worth another attempt
+TRANSIENT_ERRORS = {"DeadlineExceeded", "ServiceUnavailable", "ResourceExhausted",
+                    "InternalServerError", "TooManyRequests", "GatewayTimeout"}
+
+
+class GeminiUnavailable(RuntimeError):
+    """Raised without calling Gemini while the circuit breaker is open."""
+
+
+def is_transient(error) -> bool:
+    return isinstance(error, (TimeoutError, ConnectionError)) or type(error).__name__ in TRANSIENT_ERRORS
+
+
+class GeminiClient:
+    def __init__(self, deadline=DEADLINE, retries=RETRIES, backoff=BACKOFF,
+                 max_failures=MAX_FAILURES, cooldown=COOLDOWN):
+        self.deadline = deadline
+        self.retries = retries
+        self.backoff = backoff
+        self.health = BackendHealth("gemini", max_failures=max_failures, cooldown=cooldown)
+        self._pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="gemini")
+        self._inflight = {}     # request key -> Future of the leader's call
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "attempts": 0, "retries": 0, "timeouts": 0, "errors": 0,
+                      "coalesced": 0, "short_circuited": 0, "streams": 0}
+
+    # ------------------------------------------------------
+    def _check_circuit(self):
+        if not self.health.available():
+            self.health.skipped()
+            self.stats["short_circuited"] += 1
+            raise GeminiUnavailable("Gemini circuit open, using local fallback")
+
+    def _delay(self, attempt):
+        return self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+    @staticmethod
+    def _key(model, prompt, kwargs):
+        return id(model), prompt, json.dumps(kwargs, sort_keys=True, default=str)
+
+    def generate(self, model, prompt, deadline=None, **kwargs):
+        """
+        model.generate_content(prompt, **kwargs) within `deadline` seconds.
+        Raises GeminiUnavailable (circuit open), TimeoutError or the last error.
+        """
+        self._check_circuit()
+        deadline = deadline or self.deadline
+        key = self._key(model, prompt, kwargs)
+        with self._lock:
+            shared = self._inflight.get(key)
+            if shared is None:
+                shared = self._inflight[key] = Future()
+                leader = True
+            else:
+                leader = False
+        if not leader:
+            self.stats["coalesced"] += 1
+            try:
+                return shared.result(timeout=deadline)
+            except FutureTimeout:
+                raise TimeoutError(f"Gemini: no reply within {deadline:.1f}s")
+        try:
+            result = self._generate(model, prompt, deadline, kwargs)
+            shared.set_result(result)
+            return result
+        except BaseException as e:
+            shared.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _generate(self, model, prompt, deadline, kwargs):
+        self.stats["calls"] += 1
+        t0 = time.perf_counter()
+        end = t0 + deadline
+        attempt = 0
+        while True:
+            self.stats["attempts"] += 1
+            remaining = end - time.perf_counter()
+            future = self._pool.submit(model.generate_content, prompt,
+                                       request_options={"timeout": remaining}, **kwargs)
+            try:
+                result = future.result(timeout=remaining)
+                self.health.success(time.perf_counter() - t0)
+                return result
+            except FutureTimeout:
+                error = TimeoutError(f"Gemini: no reply within {deadline:.1f}s")
+                self.stats["timeouts"] += 1
+            except Exception as e:
+                error = e
+                self.stats["errors"] += 1
+            delay = self._delay(attempt)
+            if attempt >= self.retries or not is_transient(error) or time.perf_counter() + delay >= end:
+                self.health.failure(type(error).__name__)
+                raise error
+            attempt += 1
+            self.stats["retries"] += 1
+            print(f"🔁 Gemini {type(error).__name__}, retry {attempt} in {delay * 1000:.0f} ms")
+            time.sleep(delay)
+
+    # ------------------------------------------------------
+    def stream(self, model, prompt, first_deadline=FIRST_CHUNK_DEADLINE,
+               chunk_deadline=CHUNK_DEADLINE, **kwargs):
+        """
+        Yield the chunks of model.generate_content(prompt, stream=True).
+        Failures before the first chunk are retried like generate();
+        closing the generator stops reading the stream.
+        """
+        self._check_circuit()
+        self.stats["streams"] += 1
+        t0 = time.perf_counter()
+        end = t0 + first_deadline
+        attempt = 0
+        while True:
+            self.stats["attempts"] += 1
+            chunks = queue.Queue()
+            stop = threading.Event()
+            self._pool.submit(self._pump, model, prompt, kwargs, chunks, stop,
+                              max(0.1, end - time.perf_counter()) + chunk_deadline)
+            got = False
+            try:
+                while True:
+                    timeout = chunk_deadline if got else max(0.0, end - time.perf_counter())
+                    try:
+                        kind, item = chunks.get(timeout=timeout)
+                    except queue.Empty:
+                        self.stats["timeouts"] += 1
+                        raise TimeoutError(f"Gemini stream: nothing within {timeout:.1f}s")
+                    if kind == "error":
+                        self.stats["errors"] += 1
+                        raise item
+                    if kind == "end":
+                        if not got:
+                            self.health.success(time.perf_counter() - t0)
+                        return
+                    if not got:
+                        got = True
+                        self.health.success(time.perf_counter() - t0)
+                    yield item
+            except Exception as error:
+                delay = self._delay(attempt)
+                if got or attempt >= self.retries or not is_transient(error) \
+                        or time.perf_counter() + delay >= end:
+                    self.health.failure(type(error).__name__)
+                    raise
+                attempt += 1
+                self.stats["retries"] += 1
+                print(f"🔁 Gemini stream {type(error).__name__}, retry {attempt} in {delay * 1000:.0f} ms")
+                time.sleep(delay)
+            finally:
+                stop.set()
+
+    @staticmethod
+    def _pump(model, prompt, kwargs, chunks, stop, timeout):
+        try:
+            response = model.generate_content(prompt, stream=True,
+                                              request_options={"timeout": timeout}, **kwargs)
+            for chunk in response:
+                if stop.is_set():
+                    return
+                chunks.put(("chunk", chunk))
+            chunks.put(("end", None))
+        except Exception as e:
+            chunks.put(("error", e))
+
+    def report(self):
+        return f"{self.stats} | {self.health.report()}"
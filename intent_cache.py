@@ -0,0 +1,130 @@
+# intent_cache.py
+# ----------------------------------------------------------
+# Cache of Gemini intent classifications for Chacha
+# - memory LRU in front of a SQLite table, both size-capped, with TTL
+# - keyed on intent_router.normalize()d utterances
+# - results with contacts / messages or PC side effects are never
+#   stored, and never served if an older version stored them
+# ----------------------------------------------------------
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from intent_router import normalize
+
+INTENT_CACHE_PATH = os.environ.get(
+    "CHACHA_INTENT_CACHE", str(Path.home() / ".chacha" / "intent_cache.sqlite"))
+INTENT_CACHE_TTL = 7 * 24 * 3600     # seconds
+INTENT_CACHE_MEM_SIZE = 256          # entries kept in memory
+INTENT_CACHE_DISK_SIZE = 5000        # rows kept on disk
+
+# Contact names and message bodies must never be stored, and commands with
+# side effects on the PC are classified afresh every time (a stale or wrong
+# entry must not shut the machine down for a week)
+UNCACHEABLE_INTENTS = {"send_message", "lock_pc", "shutdown_pc", "restart_pc", "take_screenshot"}
+
+
+class IntentCache:
+    """Two-tier cache of get_gemini_json results keyed on normalized text."""
+
+    def __init__(self, path=INTENT_CACHE_PATH, ttl=INTENT_CACHE_TTL,
+                 mem_size=INTENT_CACHE_MEM_SIZE, disk_size=INTENT_CACHE_DISK_SIZE,
+                 uncacheable=UNCACHEABLE_INTENTS):
+        self.uncacheable = frozenset(uncacheable)
+        self.ttl = ttl
+        self.mem_size = mem_size
+        self.disk_size = disk_size
+        self._mem = OrderedDict()   # key -> (stored_at, data)
+        self._lock = threading.Lock()
+        self._db = None
+        self.stats = {"mem_hits": 0, "disk_hits": 0, "misses": 0, "expired": 0,
+                      "stores": 0, "skipped": 0, "mem_evictions": 0, "disk_evictions": 0}
+        if path:
+            try:
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS intents ("
+                    "key TEXT PRIMARY KEY, data TEXT NOT NULL, stored_at REAL NOT NULL, used_at REAL NOT NULL)")
+                self._db.commit()
+            except Exception as e:
+                print("⚠️ Intent cache disk tier disabled:", e)
+                self._db = None
+
+    def cacheable(self, data):
+        return bool(data) and data.get("intent") not in self.uncacheable and not data.get("contact_name")
+
+    def _remember(self, key, stored_at, data):
+        self._mem[key] = (stored_at, data)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.mem_size:
+            self._mem.popitem(last=False)
+            self.stats["mem_evictions"] += 1
+
+    def get(self, text):
+        key = normalize(text)
+        now = time.time()
+        with self._lock:
+            hit = self._mem.get(key)
+            if hit and now - hit[0] <= self.ttl:
+                self._mem.move_to_end(key)
+                self.stats["mem_hits"] += 1
+                return dict(hit[1])
+            if hit:
+                del self._mem[key]
+                self.stats["expired"] += 1
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT data, stored_at FROM intents WHERE key = ?", (key,)).fetchone()
+                data = json.loads(row[0]) if row else None
+                # rows stored before their intent became uncacheable are never served
+                if row and now - row[1] <= self.ttl and self.cacheable(data):
+                    self._db.execute("UPDATE intents SET used_at = ? WHERE key = ?", (now, key))
+                    self._db.commit()
+                    self._remember(key, row[1], data)
+                    self.stats["disk_hits"] += 1
+                    return dict(data)
+                if row:
+                    self._db.execute("DELETE FROM intents WHERE key = ?", (key,))
+                    self._db.commit()
+                    self.stats["expired"] += 1
+            self.stats["misses"] += 1
+        return None
+
+    def put(self, text, data):
+        if not self.cacheable(data):
+            self.stats["skipped"] += 1
+            return
+        key = normalize(text)
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, dict(data))
+            self.stats["stores"] += 1
+            if self._db is None:
+                return
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO intents (key, data, stored_at, used_at) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(data, ensure_ascii=False), now, now))
+                (count,) = self._db.execute("SELECT COUNT(*) FROM intents").fetchone()
+                if count > self.disk_size:
+                    extra = count - self.disk_size
+                    self._db.execute(
+                        "DELETE FROM intents WHERE key IN "
+                        "(SELECT key FROM intents ORDER BY used_at LIMIT ?)", (extra,))
+                    self.stats["disk_evictions"] += extra
+                self._db.commit()
+            except Exception as e:
+                print("⚠️ Intent cache write error:", e)
+
+    def clear(self):
+        with self._lock:
+            self._mem.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM intents")
+                self._db.commit()
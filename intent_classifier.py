@@ -0,0 +1,264 @@
+# intent_classifier.py
+# ----------------------------------------------------------
+# Offline intent classifier for Chacha
+# - hashed character n-grams of the normalized utterance
+# - softmax linear model in NumPy (train in seconds, load in ms)
+# - used by gemini_ai in front of Gemini when confident enough
+#
+#   python intent_classifier.py train data/intents_hinglish.jsonl
+#   python intent_classifier.py eval  data/intents_hinglish.jsonl [--gemini] [--holdout 0.25]
+# ----------------------------------------------------------
+
+import json
+import os
+import time
+import zlib
+
+import numpy as np
+
+from intent_router import normalize
+
+# Same intent set as gemini_ai.SYSTEM_INSTRUCTION
+INTENT_LABELS = [
+    "chat", "open_app", "open_website", "search", "play_music", "pause_music", "resume_music",
+    "stop_music", "next_music", "send_message", "detect_object", "take_screenshot", "lock_pc",
+    "shutdown_pc", "restart_pc", "open_settings",
+]
+
+# CONFIG
+MODEL_PATH = os.environ.get(
+    "CHACHA_INTENT_MODEL", os.path.join(os.path.dirname(os.path.abspath(__file__)), "intent_model.npz"))
+HASH_DIM = 1 << 14
+NGRAMS = (2, 3, 4)
+EPOCHS = 300
+LEARNING_RATE = 2.0
+L2 = 1e-4
+
+
+def features(text: str, dim: int = HASH_DIM):
+    """Sparse (indices, values) of the L2-normalized hashed n-gram vector."""
+    norm = normalize(text)
+    counts = {}
+    for n in NGRAMS:
+        for i in range(len(norm) - n + 1):
+            h = zlib.crc32(norm[i:i + n].encode("utf-8")) % dim
+            counts[h] = counts.get(h, 0.0) + 1.0
+    if not counts:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    idx = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+    val = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+    val /= np.linalg.norm(val)
+    return idx, val
+
+
+def _softmax(z):
+    z = z - z.max(axis=-1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+class IntentClassifier:
+    def __init__(self, weights, bias, labels, dim=HASH_DIM):
+        self.W = np.asarray(weights, dtype=np.float32)
+        self.b = np.asarray(bias, dtype=np.float32)
+        self.labels = list(labels)
+        self.dim = dim
+
+    # ------------------------------------------------------
+    @classmethod
+    def train(cls, samples, dim=HASH_DIM, epochs=EPOCHS, lr=LEARNING_RATE, l2=L2):
+        """samples: list of (text, intent)."""
+        labels = sorted({intent for _, intent in samples})
+        unknown = set(labels) - set(INTENT_LABELS)
+        if unknown:
+            raise ValueError(f"Unknown intents in training data: {sorted(unknown)}")
+        index = {label: i for i, label in enumerate(labels)}
+        X = np.zeros((len(samples), dim), dtype=np.float32)
+        for row, (text, _) in enumerate(samples):
+            idx, val = features(text, dim)
+            X[row, idx] = val
+        Y = np.zeros((len(samples), len(labels)), dtype=np.float32)
+        Y[np.arange(len(samples)), [index[intent] for _, intent in samples]] = 1.0
+
+        W = np.zeros((dim, len(labels)), dtype=np.float32)
+        b = np.zeros(len(labels), dtype=np.float32)
+        for _ in range(epochs):
+            grad = (_softmax(X @ W + b) - Y) / len(samples)
+            W -= lr * (X.T @ grad + l2 * W)
+            b -= lr * grad.sum(axis=0)
+        return cls(W, b, labels, dim)
+
+    def predict_proba(self, text: str):
+        idx, val = features(text, self.dim)
+        return _softmax(val @ self.W[idx] + self.b)
+
+    def predict(self, text: str):
+        """(intent, confidence)"""
+        p = self.predict_proba(text)
+        best = int(p.argmax())
+        return self.labels[best], float(p[best])
+
+    # ------------------------------------------------------
+    def save(self, path=MODEL_PATH):
+        # only rows that were ever touched are stored (sparse + float16)
+        rows = np.flatnonzero(np.any(self.W != 0, axis=1))
+        np.savez_compressed(
+            path, rows=rows.astype(np.int32), W=self.W[rows].astype(np.float16),
+            b=self.b, labels=np.array(self.labels), dim=np.array(self.dim))
+
+    @classmethod
+    def load(cls, path=MODEL_PATH):
+        data = np.load(path)
+        dim = int(data["dim"])
+        W = np.zeros((dim, len(data["labels"])), dtype=np.float32)
+        W[data["rows"]] = data["W"].astype(np.float32)
+        return cls(W, data["b"], [str(x) for x in data["labels"]], dim)
+
+
+# ----------------------------------------------------------
+# 📦 Shared instance
+# ----------------------------------------------------------
+_default = None
+_default_loaded = False
+
+
+def get_classifier():
+    """Model from MODEL_PATH, loaded once; None if it was never trained."""
+    global _default, _default_loaded
+    if not _default_loaded:
+        _default_loaded = True
+        if os.path.exists(MODEL_PATH):
+            try:
+                t0 = time.perf_counter()
+                _default = IntentClassifier.load(MODEL_PATH)
+                print(f"✅ Local intent model loaded in {(time.perf_counter() - t0) * 1000:.1f} ms.")
+            except Exception as e:
+                print("❌ Local intent model load error:", e)
+    return _default
+
+
+# ----------------------------------------------------------
+# 🚦 Confidence gate
+# ----------------------------------------------------------
+LOCAL_CONFIDENCE = 0.6
+# Only intents that need no contact / search term are answered locally.
+# shutdown_pc / restart_pc always go to Gemini: a wrong guess is too costly.
+LOCAL_INTENTS = {
+    "chat", "play_music", "pause_music", "resume_music", "stop_music", "next_music",
+    "detect_object", "take_screenshot", "lock_pc", "open_settings",
+}
+# When Gemini is unreachable the whole utterance is used as the target anyway
+FALLBACK_INTENTS = LOCAL_INTENTS | {"open_app", "open_website", "search"}
+
+
+def guess(user_text: str, min_conf=LOCAL_CONFIDENCE, allowed=LOCAL_INTENTS):
+    """get_gemini_json-style result if the local model is confident, else None."""
+    clf = get_classifier()
+    if clf is None:
+        return None
+    intent, conf = clf.predict(user_text)
+    if conf < min_conf or (allowed is not None and intent not in allowed):
+        return None
+    print(f"🏠 Local intent: {intent} ({conf:.2f})")
+    return {"intent": intent, "contact_name": None, "message_text": user_text}
+
+
+def load_jsonl(path):
+    """[(text, intent)] from lines like {"text": ..., "intent": ...}"""
+    samples = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                row = json.loads(line)
+                samples.append((row["text"], row["intent"]))
+    return samples
+
+
+def split(samples, holdout=0.25, seed=0):
+    """(train, test): every intent keeps about `holdout` of its utterances for testing."""
+    rng = np.random.default_rng(seed)
+    by_intent = {}
+    for sample in samples:
+        by_intent.setdefault(sample[1], []).append(sample)
+    train, test = [], []
+    for intent in sorted(by_intent):
+        rows = by_intent[intent]
+        order = rng.permutation(len(rows))
+        n_test = int(round(len(rows) * holdout)) if len(rows) > 1 else 0
+        test.extend(rows[i] for i in order[:n_test])
+        train.extend(rows[i] for i in order[n_test:])
+    return train, test
+
+
+# ----------------------------------------------------------
+# 🧪 Train / evaluate
+# ----------------------------------------------------------
+def _evaluate(path, use_gemini=False, model_path=MODEL_PATH, holdout=0.25, seed=0):
+    """
+    With holdout > 0 a fresh model is trained on the rest of the file and
+    scored on the held-out utterances only; holdout=0 scores model_path on
+    the whole file (its own training data if it was trained on it).
+    """
+    samples = load_jsonl(path)
+    if holdout > 0:
+        train, samples = split(samples, holdout, seed)
+        clf = IntentClassifier.train(train)
+        print(f"Trained on {len(train)} utterances, testing on {len(samples)} held out.")
+    else:
+        clf = IntentClassifier.load(model_path)
+    if use_gemini:
+        import gemini_ai
+    correct = 0
+    gated = gated_correct = 0     # what guess() would actually answer locally
+    local_ms, gemini_ms = [], []
+    for text, label in samples:
+        if use_gemini:
+            # Gemini's own answer: no offline classifier, no cached labels
+            t0 = time.perf_counter()
+            label = gemini_ai.get_gemini_json(text, use_local=False, use_cache=False).get("intent", "chat")
+            gemini_ms.append((time.perf_counter() - t0) * 1000)
+        t0 = time.perf_counter()
+        intent, conf = clf.predict(text)
+        local_ms.append((time.perf_counter() - t0) * 1000)
+        correct += intent == label
+        if conf >= LOCAL_CONFIDENCE and intent in LOCAL_INTENTS:
+            gated += 1
+            gated_correct += intent == label
+        if intent != label:
+            print(f"✗ {text!r}: local={intent} ({conf:.2f}) expected={label}")
+    reference = ("Gemini" if use_gemini else "file") + (" labels, held out" if holdout > 0 else " labels, training data")
+    print(f"\nAccuracy vs {reference}: {correct}/{len(samples)} = {correct / max(1, len(samples)):.1%}")
+    print(f"Answered locally (gate {LOCAL_CONFIDENCE}): {gated}/{len(samples)}, "
+          f"correct {gated_correct}/{gated} = {gated_correct / max(1, gated):.1%}")
+    print(f"Local latency: mean {np.mean(local_ms):.3f} ms | p95 {np.percentile(local_ms, 95):.3f} ms")
+    if gemini_ms:
+        print(f"Gemini latency: mean {np.mean(gemini_ms):.0f} ms | p95 {np.percentile(gemini_ms, 95):.0f} ms")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Train or evaluate Chacha's local intent classifier.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_train = sub.add_parser("train")
+    p_train.add_argument("data")
+    p_train.add_argument("-o", "--output", default=MODEL_PATH)
+    p_eval = sub.add_parser("eval")
+    p_eval.add_argument("data")
+    p_eval.add_argument("-m", "--model", default=MODEL_PATH)
+    p_eval.add_argument("--gemini", action="store_true",
+                        help="label each utterance with gemini_ai.get_gemini_json (intent cache bypassed)")
+    p_eval.add_argument("--holdout", type=float, default=0.25,
+                        help="fraction per intent held out for testing; 0 scores --model on the whole file")
+    p_eval.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.cmd == "train":
+        t0 = time.perf_counter()
+        samples = load_jsonl(args.data)
+        clf = IntentClassifier.train(samples)
+        clf.save(args.output)
+        print(f"✅ Trained on {len(samples)} utterances in {time.perf_counter() - t0:.1f}s → {args.output}")
+    else:
+        _evaluate(args.data, use_gemini=args.gemini, model_path=args.model, holdout=args.holdout, seed=args.seed)
@@ -0,0 +1,221 @@
+# intent_router.py
+# ----------------------------------------------------------
+# Local fast-path intent router for Chacha
+# - one declarative keyword table, compiled once into a single regex
+# - Devanagari + Romanized Hinglish normalized to the same spelling
+# - answers deterministic commands in microseconds; returns None
+#   (abstains) for everything that needs Gemini
+# ----------------------------------------------------------
+
+import re
+import unicodedata
+
+# ----------------------------------------------------------
+# 📋 Keyword table: (intent, priority, phrases)
+# Lower priority number wins; among equal priorities the longest
+# phrase wins ("music band karo" is stop_music, not exit).
+# ----------------------------------------------------------
+ROUTES = [
+    ("set_reminder", 0, ["yaad dilana", "yaad dila dena", "remind", "remind me", "reminder", "reminders",
+                         "reminder lagao", "reminder laga do", "reminder set karo", "reminder set kar do",
+                         "set reminder", "set a reminder", "alarm lagao", "alarm set karo", "set timer",
+                         "timer lagao", "याद दिलाना", "रिमाइंडर"]),
+    ("detect_object", 0, ["ye kya", "yeh kya", "what is this", "dekho ye kya", "batado ye", "chacha ye kya",
+                          "mere haath me kya", "dekho yah kya hai", "ये क्या"]),
+    ("stop_music", 0, ["stop music", "music stop", "music band", "gaana band", "song band", "stop song",
+                       "गाना बंद"]),
+    ("set_volume", 0, ["awaaz band", "volume band", "sound band", "mute", "आवाज़ बंद"]),
+    ("exit", 1, ["exit", "quit", "goodbye", "band kar", "band karo", "band kardo", "band kar do",
+                 "chacha band karo", "stop program"]),
+    ("youtube_search", 1, ["youtube", "यूट्यूब"]),
+    ("pause_music", 2, ["pause", "music roko", "gaana roko", "song roko", "गाना रोको"]),
+    ("resume_music", 2, ["music resume", "resume music", "gaana resume", "song resume", "resume song",
+                         "resume the music", "unpause", "music wapas chalao", "gaana wapas chalao", "phir se chalao"]),
+    ("next_music", 2, ["next song", "next music", "next track", "next gaana", "agla gaana", "agla song",
+                       "skip song", "dusra gaana", "अगला गाना"]),
+    ("play_music", 2, ["play music", "music play", "play song", "play songs", "music chalao", "music bajao",
+                       "gaana chalao", "gaana bajao", "gaane chalao", "song chalao", "song bajao",
+                       "गाना चलाओ", "गाना बजाओ"]),
+    ("set_volume", 2, ["volume", "awaaz", "awaz", "sound", "आवाज़"]),
+    ("time", 2, ["time", "samay", "kitne baje", "kya baja", "टाइम", "समय"]),
+    ("date", 2, ["date", "tareekh", "tarikh", "तारीख"]),
+    ("battery", 2, ["battery", "charge", "charging", "बैटरी"]),
+    ("take_screenshot", 2, ["screenshot", "screen shot", "स्क्रीनशॉट"]),
+    ("lock_pc", 2, ["lock pc", "pc lock", "lock computer", "computer lock", "lock the computer",
+                    "lock laptop", "laptop lock"]),
+]
+
+# ----------------------------------------------------------
+# 🔤 Devanagari → Roman
+# ----------------------------------------------------------
+_CONSONANTS = {
+    "क": "k", "ख": "kh", "ग": "g", "घ": "gh", "ङ": "n",
+    "च": "ch", "छ": "chh", "ज": "j", "झ": "jh", "ञ": "n",
+    "ट": "t", "ठ": "th", "ड": "d", "ढ": "dh", "ण": "n",
+    "त": "t", "थ": "th", "द": "d", "ध": "dh", "न": "n",
+    "प": "p", "फ": "ph", "ब": "b", "भ": "bh", "म": "m",
+    "य": "y", "र": "r", "ल": "l", "व": "v",
+    "श": "sh", "ष": "sh", "स": "s", "ह": "h",
+    "क़": "k", "ख़": "kh", "ग़": "g", "ज़": "z", "ड़": "r", "ढ़": "rh", "फ़": "f", "य़": "y",
+}
+_VOWELS = {
+    "अ": "a", "आ": "aa", "इ": "i", "ई": "ee", "उ": "u", "ऊ": "oo", "ऋ": "ri",
+    "ए": "e", "ऐ": "ai", "ओ": "o", "औ": "au", "ऑ": "o",
+}
+_MATRAS = {
+    "ा": "aa", "ि": "i", "ी": "ee", "ु": "u", "ू": "oo", "ृ": "ri",
+    "े": "e", "ै": "ai", "ो": "o", "ौ": "au", "ॉ": "o", "्": "",
+}
+_NASALS = {"ं": "n", "ँ": "n", "ः": "h"}
+_NUKTA = "़"
+_DIGITS = str.maketrans("०१२३४५६७८९", "0123456789")
+_DEVANAGARI = re.compile(r"[ऀ-ॿ]+")
+
+
+def _translit_word(word):
+    """Transliterate one Devanagari word with simple Hindi schwa deletion."""
+    units = []   # [kind, roman, vowel]; vowel None = inherent 'a'
+    i = 0
+    while i < len(word):
+        ch = word[i]
+        if i + 1 < len(word) and word[i + 1] == _NUKTA:
+            ch += _NUKTA
+            i += 1
+        if ch in _CONSONANTS:
+            units.append(["C", _CONSONANTS[ch], None])
+        elif ch in _MATRAS and units and units[-1][0] == "C":
+            units[-1][2] = _MATRAS[ch]
+        elif ch in _VOWELS:
+            units.append(["V", _VOWELS[ch], ""])
+        elif ch in _NASALS and units:
+            u = units[-1]
+            if u[0] == "V":
+                u[1] += _NASALS[ch]
+            else:
+                u[2] = ("a" if u[2] is None else u[2]) + _NASALS[ch]
+        i += 1
+
+    # final inherent 'a' is silent; a medial one between VC and CV too
+    if units and units[-1][0] == "C" and units[-1][2] is None and len(units) > 1:
+        units[-1][2] = ""
+
+    def has_vowel(u):
+        return u[0] == "V" or u[2] is None or u[2] != ""
+
+    for j in range(len(units) - 2, 0, -1):
+        u = units[j]
+        if u[0] == "C" and u[2] is None and has_vowel(units[j - 1]) and \
+                units[j + 1][0] == "C" and has_vowel(units[j + 1]):
+            u[2] = ""
+    return "".join(u[1] + ("a" if u[2] is None else u[2]) for u in units)
+
+
+# Hinglish spelling variants collapsed to one form (gaana/gana, awaaz/awaz, ...)
+_SPELLING = {"ee": "i", "oo": "u", "ph": "f", "sh": "s", "w": "v", "z": "j", "q": "k"}
+_SPELLING_RE = re.compile("|".join(_SPELLING))
+_REPEAT_RE = re.compile(r"([a-z])\1+")
+_NON_WORD_RE = re.compile(r"[^a-z0-9%]+")
+
+
+def normalize(text: str) -> str:
+    """Lowercase, transliterate Devanagari and collapse Hinglish spellings."""
+    text = (text or "").lower()
+    if not text.isascii():
+        text = unicodedata.normalize("NFC", text).translate(_DIGITS)
+        text = _DEVANAGARI.sub(lambda m: _translit_word(m.group(0)), text)
+    text = _NON_WORD_RE.sub(" ", text)
+    text = _SPELLING_RE.sub(lambda m: _SPELLING[m.group(0)], text)
+    text = _REPEAT_RE.sub(r"\1", text)
+    return f" {text.strip()} "
+
+
+# ----------------------------------------------------------
+# ⚙️ Compile once
+# ----------------------------------------------------------
+def _compile(routes):
+    table = {}
+    for intent, priority, phrases in routes:
+        for phrase in phrases:
+            key = normalize(phrase).strip()
+            if key and key not in table:
+                table[key] = (intent, priority)
+    # longest first so the alternation prefers "music band" over "band";
+    # the lookahead makes finditer report overlapping matches in one pass
+    keys = sorted(table, key=len, reverse=True)
+    pattern = re.compile(r"(?<= )(?=(" + "|".join(re.escape(k) for k in keys) + r") )")
+    return pattern, table
+
+
+_PATTERN, _TABLE = _compile(ROUTES)
+stats = {"routed": 0, "abstained": 0}
+
+
+def route(user_text: str):
+    """
+    Return {"intent", "contact_name", "message_text", "matched"} for a
+    deterministic command, or None when Gemini should decide.
+    """
+    norm = normalize(user_text)
+    best = None
+    for m in _PATTERN.finditer(norm):
+        intent, priority = _TABLE[m.group(1)]
+        rank = (priority, -len(m.group(1)))
+        if best is None or rank < best[0]:
+            best = (rank, intent, m.group(1))
+    if best is None:
+        stats["abstained"] += 1
+        return None
+    stats["routed"] += 1
+    return {
+        "intent": best[1],
+        "contact_name": None,
+        "message_text": user_text,
+        "matched": best[2],
+    }
+
+
+# ----------------------------------------------------------
+# ⏱️ Micro-benchmark: router vs. the old any(k in text) chains
+# ----------------------------------------------------------
+def _legacy_chain(user_text):
+    """The substring scans process_command used before the router."""
+    if any(k in user_text for k in ["volume", "awaaz", "sound"]):
+        return "set_volume"
+    if any(k in user_text for k in ["yaad dilana", "remind", "alarm lagao", "set timer"]):
+        return "set_reminder"
+    if any(k in user_text for k in ["time", "samay", "kitne baje", "date", "aaj ki tareekh", "tarikh",
+                                    "date batao", "aaj kya date hai"]):
+        return "time"
+    if any(w in user_text for w in ["exit", "quit", "band kar", "goodbye", "stop program"]):
+        return "exit"
+    if any(k in user_text for k in ["battery", "charge", "battery status", "kitni battery",
+                                    "charging hai ya nahi"]):
+        return "battery"
+    if "youtube" in user_text:
+        return "youtube_search"
+    if any(k in user_text for k in ["ye kya", "what is this", "dekho ye kya", "batado ye", "chacha ye kya",
+                                    "mere haath me kya", "dekho yah kya hai"]):
+        return "detect_object"
+    return None
+
+
+if __name__ == "__main__":
+    import timeit
+
+    samples = [
+        "pause music", "next song", "lock pc", "screenshot le lo", "volume 40 percent",
+        "गाना चलाओ", "aaj kitne baje hain", "battery kitni hai", "music band karo",
+        "chacha aap kaise ho", "google pe python tutorial search karo", "rahul ko message bhejo hello",
+    ]
+    for s in samples:
+        r = route(s)
+        print(f"{s!r:45} → {r['intent'] if r else '(gemini)'}")
+
+    n = 20000
+    t_router = timeit.timeit(lambda: [route(s) for s in samples], number=n // len(samples))
+    t_legacy = timeit.timeit(lambda: [_legacy_chain(s.lower()) for s in samples], number=n // len(samples))
+    per = n // len(samples) * len(samples)
+    print(f"\nrouter : {t_router / per * 1e6:.2f} µs/utterance")
+    print(f"legacy : {t_legacy / per * 1e6:.2f} µs/utterance (and {sum(_legacy_chain(s) is None for s in samples)}"
+          f"/{len(samples)} samples still need a Gemini round trip)")
+    print(f"router abstained on {sum(route(s) is None for s in samples)}/{len(samples)} samples")
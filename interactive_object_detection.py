@@ -12,7 +12,9 @@ import cv2
 import numpy as np
 from ultralytics import YOLO
 import os
-from voice import say
+from voice import say, NARRATION
+import object_descriptions
+from detections import Detections, merge_scales, fuse_frames
 import traceback
 
 # optional Gemini shorthand
@@ -32,13 +34,16 @@ IN_HAND_IOU = 0.15
 MIN_CONF_FOR_DESCRIPTION = 0.35
 CONTINUOUS_INTERVAL = 2.0   # seconds between spoken updates in continuous mode
 REPEAT_COOLDOWN = 6.0       # seconds to avoid repeating same object
+DESCRIBE_FRAMES = 3         # frames ask_and_describe looks at
+FRAME_INTERVAL = 0.15       # seconds between them
 
 # Globals
 _latest_frame = None
 _latest_frame_ts = 0.0
 _capture_thread = None
-_capture_running = False
+_capture_stop = threading.Event()      # stop signal of the current capture thread
 _capture_lock = threading.Lock()
+_capture_start_lock = threading.Lock()
 
 _inspect_thread = None
 _inspect_running = False
@@ -47,31 +52,42 @@ _last_spoken_object = None
 _last_spoken_ts = 0.0
 
 yolo_model = None
+_model_lock = threading.Lock()
+_model_tried = False
 
-# Load model
-try:
-    yolo_model = YOLO(MODEL_PATH)
-    print("✅ Interactive YOLO model loaded.")
-except Exception as e:
-    print("❌ Could not load YOLO model:", e)
-    yolo_model = None
+
+def load_model():
+    """Load YOLO once (called by the warm-up manager or on first detection)."""
+    global yolo_model, _model_tried
+    with _model_lock:
+        if not _model_tried:
+            _model_tried = True
+            try:
+                yolo_model = YOLO(MODEL_PATH)
+                print("✅ Interactive YOLO model loaded.")
+            except Exception as e:
+                print("❌ Could not load YOLO model:", e)
+                yolo_model = None
+    return yolo_model
 
 
-def _camera_loop():
-    global _latest_frame, _latest_frame_ts, _capture_running
+def _camera_loop(stop):
+    """Capture until `stop` is set; each thread has its own event, so a restart never revives it."""
+    global _latest_frame, _latest_frame_ts
+    cap = None
     try:
         cap = cv2.VideoCapture(CAMERA_INDEX)
         if not cap.isOpened():
             say("Camera accessible nahi hai.")
-            _capture_running = False
             return
-        _capture_running = True
-        while _capture_running:
+        while not stop.is_set():
             ret, frame = cap.read()
             if not ret:
                 time.sleep(0.03)
                 continue
             with _capture_lock:
+                if stop.is_set():
+                    break   # stopped while reading: don't publish after the frame was cleared
                 _latest_frame = frame.copy()
                 _latest_frame_ts = time.time()
             time.sleep(0.02)
@@ -79,29 +95,52 @@ def _camera_loop():
         print("Camera loop error:", e)
         traceback.print_exc()
     finally:
-        try:
-            cap.release()
-        except Exception:
-            pass
-        _capture_running = False
+        stop.set()
+        if cap is not None:
+            try:
+                cap.release()
+            except Exception:
+                pass
 
 
-def start_camera_background():
+def start_camera_background(wait=True):
     """Start camera in background (safe to call multiple times)."""
-    global _capture_thread, _capture_running
-    if _capture_running:
-        return
-    _capture_thread = threading.Thread(target=_camera_loop, daemon=True)
-    _capture_thread.start()
-    # warm-up little
+    global _capture_thread, _capture_stop
+    with _capture_start_lock:
+        if not is_camera_running():
+            previous = _capture_thread
+            if previous is not None and previous.is_alive():
+                previous.join(timeout=1.0)   # let the stopped loop release the device first
+            _capture_stop = threading.Event()
+            _capture_thread = threading.Thread(target=_camera_loop, args=(_capture_stop,), daemon=True)
+            _capture_thread.start()
+    if wait:
+        wait_for_frame(1.0)
+
+
+def _has_fresh_frame():
+    return _latest_frame is not None and time.time() - _latest_frame_ts <= MAX_FRAME_AGE
+
+
+def wait_for_frame(timeout=1.0):
+    """Block until the camera delivered a frame fresh enough to use (True) or timeout (False)."""
     t0 = time.time()
-    while time.time() - t0 < 1.0 and _latest_frame is None:
+    while time.time() - t0 < timeout and not _has_fresh_frame():
         time.sleep(0.05)
+    return _has_fresh_frame()
 
 
 def stop_camera_background():
-    global _capture_running
-    _capture_running = False
+    """Stop capturing and forget the last frame, so nobody analyzes an old view."""
+    global _latest_frame, _latest_frame_ts
+    _capture_stop.set()
+    with _capture_lock:
+        _latest_frame = None
+        _latest_frame_ts = 0.0
+
+
+def is_camera_running():
+    return _capture_thread is not None and _capture_thread.is_alive() and not _capture_stop.is_set()
 
 
 def _get_latest_frame():
@@ -114,72 +153,57 @@ def _get_latest_frame():
         return _latest_frame.copy()
 
 
-def _detect_on_image(img, imgsz=640, conf=CONF_THRESHOLD):
-    results = []
-    if yolo_model is None:
-        return results
+def _detect_batch(images, imgsz=640, conf=CONF_THRESHOLD, device=None):
+    """One YOLO call for all images; a columnar Detections per image."""
+    if not images or load_model() is None:
+        return [Detections() for _ in images]
     try:
-        res = yolo_model(img, imgsz=imgsz, conf=conf, verbose=False)
-        r = res[0]
-        boxes = getattr(r, "boxes", None)
-        names = getattr(r, "names", {})
-        if boxes is None:
-            return results
-        for b in boxes:
-            try:
-                conf_score = float(b.conf[0])
-                cls_id = int(b.cls[0])
-                label = names.get(cls_id, str(cls_id))
-                x1, y1, x2, y2 = map(int, b.xyxy[0].tolist())
-                area = max(1, (x2 - x1) * (y2 - y1))
-                results.append({
-                    "name": label,
-                    "conf": conf_score,
-                    "bbox": (x1, y1, x2, y2),
-                    "area": area
-                })
-            except Exception:
-                continue
+        kwargs = {"device": device} if device is not None else {}
+        res = yolo_model(list(images), imgsz=imgsz, conf=conf, verbose=False, **kwargs)
+        return [Detections.from_result(r) for r in res]
     except Exception as e:
         print("YOLO error:", e)
-    return results
+        return [Detections() for _ in images]
 
 
-def _multi_scale_detect(frame):
-    detections = _detect_on_image(frame, imgsz=640, conf=CONF_THRESHOLD)
+def _multi_scale_detect_batch(frames, device=None):
+    """
+    Detections of several frames with one batched YOLO call per scale
+    (native @640, 2x upscaled @1024); the scales are merged by class-aware NMS.
+    """
+    native = _detect_batch(frames, imgsz=640, conf=CONF_THRESHOLD, device=device)
     try:
-        h, w = frame.shape[:2]
-        up = cv2.resize(frame, (w * UPSCALE_FACTOR, h * UPSCALE_FACTOR), interpolation=cv2.INTER_LINEAR)
-        small_dets = _detect_on_image(up, imgsz=1024, conf=SMALL_OBJ_CONF)
-        for d in small_dets:
-            x1, y1, x2, y2 = d["bbox"]
-            d["bbox"] = (int(x1 / UPSCALE_FACTOR), int(y1 / UPSCALE_FACTOR),
-                         int(x2 / UPSCALE_FACTOR), int(y2 / UPSCALE_FACTOR))
-        detections.extend(small_dets)
+        ups = []
+        for frame in frames:
+            h, w = frame.shape[:2]
+            ups.append(cv2.resize(frame, (w * UPSCALE_FACTOR, h * UPSCALE_FACTOR), interpolation=cv2.INTER_LINEAR))
+        small = _detect_batch(ups, imgsz=1024, conf=SMALL_OBJ_CONF, device=device)
     except Exception as e:
-        pass
-
-    # dedupe by IoU, keep highest conf
-    merged = []
-    detections_sorted = sorted(detections, key=lambda x: -x["conf"])
-    for d in detections_sorted:
-        x1, y1, x2, y2 = d["bbox"]
-        area = d["area"]
-        keep = True
-        for m in merged:
-            mx1, my1, mx2, my2 = m["bbox"]
-            ix1 = max(x1, mx1); iy1 = max(y1, my1)
-            ix2 = min(x2, mx2); iy2 = min(y2, my2)
-            iw = max(0, ix2 - ix1); ih = max(0, iy2 - iy1)
-            inter = iw * ih
-            union = area + m["area"] - inter
-            iou = inter / union if union > 0 else 0
-            if iou > 0.45:
-                keep = False
-                break
-        if keep:
-            merged.append(d)
-    return merged
+        small = [Detections() for _ in frames]
+    return [merge_scales(n, sm, UPSCALE_FACTOR) for n, sm in zip(native, small)]
+
+
+def _multi_scale_detect(frame, device=None):
+    return _multi_scale_detect_batch([frame], device=device)[0].to_dicts()
+
+
+def _capture_frames(count=DESCRIBE_FRAMES, interval=FRAME_INTERVAL, grab=None):
+    """Grab `count` frames `interval` seconds apart (frames only, no inference)."""
+    grab = grab or _get_latest_frame
+    frames = []
+    for i in range(count):
+        if i:
+            time.sleep(interval)
+        f = grab()
+        if f is not None:
+            frames.append(f)
+    return frames
+
+
+def _describe_candidates(grab=None, device=None):
+    """Detections of a few recent frames, captured first, detected in batches, fused by IoU."""
+    frames = _capture_frames(grab=grab)
+    return fuse_frames(_multi_scale_detect_batch(frames, device=device)).to_dicts()
 
 
 def _choose_relevant_object(detections, frame):
@@ -208,13 +232,22 @@ def _choose_relevant_object(detections, frame):
     return chosen
 
 
-def _describe_with_gemini(name):
-    if gemini_ai and hasattr(gemini_ai, "get_gemini_response"):
+def _describe(name, wait=True):
+    """
+    Description from the shipped table; Gemini only fills in missing
+    classes (wait=False: in the background, this time a short fallback).
+    """
+    desc = object_descriptions.describe(name)
+    if desc:
+        return desc
+    if gemini_ai and hasattr(gemini_ai, "get_gemini_text"):
         try:
-            prompt = f"Briefly describe what a {name} is and one common use in one short sentence."
-            resp = gemini_ai.get_gemini_response(prompt, speak=False)
-            if resp and resp != "error":
-                return resp
+            if not wait:
+                object_descriptions.refresh_in_background(name, gemini_ai.get_gemini_text)
+            else:
+                desc = object_descriptions.refresh(name, gemini_ai.get_gemini_text)
+                if desc:
+                    return desc
         except Exception as e:
             pass
     return f"A {name}."
@@ -227,22 +260,8 @@ def ask_and_describe():
         return
     say("Theek hai, dekh raha hoon.")
     time.sleep(0.4)
-    # gather detections from a few frames to be robust
-    candidates = []
-    for _ in range(3):
-        f = _get_latest_frame()
-        if f is None:
-            continue
-        dets = _multi_scale_detect(f)
-        candidates.extend(dets)
-        time.sleep(0.15)
-    # choose best from aggregated list
-    merged = {}
-    for d in candidates:
-        key = (d["name"], d["bbox"])
-        if key not in merged or d["conf"] > merged[key]["conf"]:
-            merged[key] = d
-    detections = list(merged.values())
+    # gather detections from a few frames to be robust, choose best from aggregated list
+    detections = _describe_candidates()
     chosen = _choose_relevant_object(detections, frame)
     if not chosen:
         say("Mujhe kuch clearly nazar nahi aaya. Thoda paas laakar dikhaiye.")
@@ -257,7 +276,7 @@ def ask_and_describe():
         lead = f"Yeh aapke haath mein lagta hai. Yeh {name} hai."
     else:
         lead = f"Yeh yahan nazar aa raha hai. Yeh {name} hai."
-    desc = _describe_with_gemini(name)
+    desc = _describe(name)
     say(f"{lead} {desc}")
     # update last spoken
     global _last_spoken_object, _last_spoken_ts
@@ -294,8 +313,8 @@ def _continuous_inspect_loop():
                         lead = f"Yeh aapke haath mein lagta hai. Yeh {name} hai."
                     else:
                         lead = f"Yeh yahan nazar aa raha hai. Yeh {name} hai."
-                    desc = _describe_with_gemini(name)
-                    say(f"{lead} {desc}")
+                    desc = _describe(name, wait=False)
+                    say(f"{lead} {desc}", priority=NARRATION)
                     _last_spoken_object = name
                     _last_spoken_ts = now
             time.sleep(CONTINUOUS_INTERVAL)
@@ -321,8 +340,64 @@ def stop_continuous_inspect():
     _inspect_running = False
 
 
+# ----------------------------------------------------------
+# 🧪 Benchmark: serial vs batched multi-frame detection
+# ----------------------------------------------------------
+def _serial_candidates(grab, device=None):
+    """The previous ask_and_describe path: detect each frame (2 YOLO calls) right after grabbing it."""
+    per_frame = []
+    for _ in range(DESCRIBE_FRAMES):
+        f = grab()
+        if f is None:
+            continue
+        per_frame.extend(_multi_scale_detect_batch([f], device=device))
+        time.sleep(FRAME_INTERVAL)
+    return fuse_frames(per_frame).to_dicts()
+
+
+def _bench(image=None, rounds=5, device="cpu"):
+    if load_model() is None:
+        return
+    if image:
+        frame = cv2.imread(image)
+    else:
+        start_camera_background(wait=True)
+        frame = _get_latest_frame()
+    if frame is None:
+        frame = np.random.randint(0, 255, (480, 640, 3), dtype=np.uint8)
+        print("⚠️ No image / camera frame: benchmarking on noise.")
+    grab = lambda: frame.copy()
+    _serial_candidates(grab, device)      # warm-up (weights, kernels)
+    _describe_candidates(grab, device)
+    serial, batched = [], []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        a = _serial_candidates(grab, device)
+        serial.append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        b = _describe_candidates(grab, device)
+        batched.append(time.perf_counter() - t0)
+    same = sorted((d["name"], d["bbox"]) for d in a) == sorted((d["name"], d["bbox"]) for d in b)
+    print(f"{DESCRIBE_FRAMES} frames x 2 scales on {device}, {rounds} rounds (incl. {FRAME_INTERVAL * 1000:.0f} ms frame gaps)")
+    print(f"serial  : {np.mean(serial) * 1000:7.0f} ms | {DESCRIBE_FRAMES * 2} YOLO calls")
+    print(f"batched : {np.mean(batched) * 1000:7.0f} ms | 2 YOLO calls | same detections: {same}")
+
+
 # small demo support if run directly
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Chacha interactive object detection")
+    parser.add_argument("--bench", action="store_true",
+                        help="end-to-end latency of serial vs batched ask_and_describe detection")
+    parser.add_argument("--image", help="benchmark on this image instead of the camera")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--device", default="cpu")
+    args = parser.parse_args()
+    if args.bench:
+        _bench(args.image, args.rounds, args.device)
+        stop_camera_background()
+        raise SystemExit
     start_camera_background()
     say("Interactive detection ready. Bolo 'Chacha, ye kya hai' ya 'continue detecting' shuru karne ke liye.")
     try:
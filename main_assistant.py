@@ -1,34 +1,147 @@
 import time
-import speech_recognition as sr
-import gemini_ai
-import chrome_control
-import music_control
-import interactive_object_detection as iobj
-import system_control
-import whatsapp_control
-import reminder_control
-from voice import say
-import psutil
+_T_START = time.perf_counter()
+
+import argparse
 import datetime
+import os
+import re
+from plugin_registry import HandlerRegistry, timed_import, import_times, print_import_report
+
+# Needed before the first "Namaste": voice + microphone
+voice = timed_import("voice")
+say = voice.say
+audio_stream = timed_import("audio_stream")
+asr_backends = timed_import("asr_backends")
+intent_router = timed_import("intent_router")
+request_context = timed_import("request_context")
+intent_classifier = timed_import("intent_classifier")
+from command_pipeline import CommandPipeline
+from request_context import RequestContext
+from warmup import WarmupManager
+from prefetch import Speculator
+
+
+# ----------------------------------------------------------
+# 🧩 Handler Registry (modules load on first use)
+# ----------------------------------------------------------
+registry = HandlerRegistry()
+gemini_ai = registry.lazy("gemini_ai")
+chrome_control = registry.lazy("chrome_control")
+music_control = registry.lazy("music_control")
+iobj = registry.lazy("interactive_object_detection")
+system_control = registry.lazy("system_control")
+whatsapp_control = registry.lazy("whatsapp_control")
+reminder_control = registry.lazy("reminder_control")
+psutil = registry.lazy("psutil")
+
+registry.register("take_screenshot", "system_control", "take_screenshot")
+registry.register("lock_pc", "system_control", "lock_pc")
+registry.register("shutdown_pc", "system_control", "shutdown_pc")
+registry.register("restart_pc", "system_control", "restart_pc")
+registry.register("open_settings", "system_control", "open_settings")
+registry.register("play_music", "music_control", "play_track", 0)
+registry.register("next_music", "music_control", "play_next")
+registry.register("stop_music", "music_control", "stop_music")
+registry.register("resume_music", "music_control", "resume_music")
+registry.register("pause_music", "music_control", "pause_music")
+
+
+# ----------------------------------------------------------
+# 🔥 Background warm-up (started right after the greeting)
+# ----------------------------------------------------------
+WARM_CAMERA = False         # opening the camera at startup turns its light on
+GEMINI_WAIT = 3.0           # seconds a command waits for a warming resource
+YOLO_WAIT = 15.0
+MIXER_WAIT = 2.0
+
+warmup = WarmupManager()
+warmup.register("gemini", lambda: gemini_ai.intent_model())
+warmup.register("yolo", lambda: iobj.load_model())
+warmup.register("mixer", lambda: music_control.init_mixer())
+warmup.register("tts_offline", voice.warm_offline_engine)
+warmup.register("tts_cache", voice.prewarm_cache)
+warmup.register("tts_templates", voice.prewarm_templates)
+if WARM_CAMERA:
+    warmup.register("camera", lambda: iobj.start_camera_background(wait=True))
+
+# intent -> warm-up resource it needs
+_NEEDS = {"play_music": "mixer", "next_music": "mixer", "resume_music": "mixer"}
+
+
+# ----------------------------------------------------------
+# 🔮 Speculative prefetch (runs while Gemini is classifying)
+# ----------------------------------------------------------
+def _prefetch_camera():
+    if iobj.is_camera_running():
+        return False
+    iobj.start_camera_background(wait=False)
+    return True
+
+
+def _release_camera(started):
+    if started:
+        iobj.stop_camera_background()
+
+
+def _prefetch_playlist():
+    music_control.init_mixer()
+    if not music_control.playlist:
+        music_control.build_playlist()
+
+
+def _release_chrome(proc):
+    if proc is not None:
+        proc.terminate()
+
+
+speculator = Speculator()
+speculator.register("camera", ["detect_object"], _prefetch_camera, _release_camera, min_conf=0.35)
+speculator.register("playlist", ["play_music", "next_music", "resume_music"], _prefetch_playlist, min_conf=0.3)
+speculator.register("chrome", ["search", "open_website", "browse", "google_search", "youtube_search"],
+                    lambda: chrome_control.open_chrome(), _release_chrome, min_conf=0.5)
 
 
 # ----------------------------------------------------------
 # 🎧 Listen Once
 # ----------------------------------------------------------
+ASR_BACKEND = os.environ.get("CHACHA_ASR", "google")
+_asr = None
+
+
+def get_asr():
+    global _asr
+    if _asr is None:
+        _asr = asr_backends.create_backend(ASR_BACKEND)
+    return _asr
+
+
 def listen_once(timeout=12, phrase_time_limit=8):
-    r = sr.Recognizer()
+    """Pop the next utterance from the always-on stream and return its transcript."""
     try:
-        with sr.Microphone() as source:
-            r.pause_threshold = 0.6
-            r.adjust_for_ambient_noise(source, duration=0.5)
-            audio = r.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
-    except (sr.WaitTimeoutError, KeyboardInterrupt):
+        stream = audio_stream.get_audio_stream()
+        stream.phrase_time_limit = phrase_time_limit
+        utterance = stream.get_utterance(timeout=timeout)
+    except KeyboardInterrupt:
         return "none"
     except Exception as e:
         print("🎤 Mic error:", e)
         return "none"
+    if utterance is None:
+        return "none"
+    if utterance.muted:
+        # started while Chacha was speaking: our own voice, not worth an ASR call
+        if utterance.session is not None:
+            utterance.session.cancel()
+        return "none"
     try:
-        text = r.recognize_google(audio, language="en-IN").strip()
+        if utterance.session is not None:
+            # already decoded while the user was speaking
+            text = utterance.session.finish()
+        else:
+            text = get_asr().transcribe(utterance.audio)
+        text = (text or "").strip()
+        if not text:
+            return "none"
         print(f"🗣️ Heard: {text}")
         return text
     except Exception:
@@ -61,15 +174,29 @@ def process_command(user_input: str):
 
     user_text = user_input.strip().lower()
     print(f"\n🎯 Processing: {user_text}")
+    ctx = RequestContext(user_text)
+    try:
+        return _handle_command(user_text, ctx)
+    finally:
+        ctx.mark("total")
+        print(f"⏱️ {ctx.summary()}")
+
+
+def _handle_command(user_text: str, ctx: RequestContext):
+    # ⚡ Local fast path (single regex pass, no network)
+    with ctx.timed("route"):
+        routed = intent_router.route(user_text)
+    fast_intent = routed["intent"] if routed else None
+    if routed:
+        ctx.set_intent(routed, "router")
 
     # 🔉 Voice-controlled Volume Commands
-    if any(k in user_text for k in ["volume", "awaaz", "sound"]):
-        import re
+    if fast_intent == "set_volume":
         match = re.search(r"(\d+)\s*%?", user_text)
         if match:
             level = int(match.group(1))
             music_control.set_system_volume(level)
-            say(f"Awaaz {level} percent kar di.")
+            voice.say_template("volume", number=level)
             return
         elif any(k in user_text for k in ["full", "max", "poori", "zyada"]):
             music_control.set_system_volume(100)
@@ -79,9 +206,11 @@ def process_command(user_input: str):
             music_control.set_system_volume(30)
             say("Awaaz kam kar di.")
             return
+        routed = None  # no level given: let Gemini decide
+        ctx.intent = ctx.source = None
 
-    # 🕒 Reminder (MOVE THIS OUTSIDE volume block)
-    if any(k in user_text for k in ["yaad dilana", "remind", "alarm lagao", "set timer"]):
+    # 🕒 Reminder
+    if fast_intent == "set_reminder":
         delay, msg = reminder_control.extract_delay_and_message(user_text)
         if delay > 0 and msg:
             reminder_control.set_reminder(delay, msg)
@@ -89,38 +218,63 @@ def process_command(user_input: str):
             say("Mujhe samajh nahi aaya kitne time baad ya kya yaad dilana hai.")
         return
     # 🕒 Time and Date
-    if any(k in user_text for k in ["time", "samay", "kitne baje", "date", "aaj ki tareekh", "tarikh", "date batao", "aaj kya date hai"]):
+    if fast_intent in ("time", "date"):
         now = datetime.datetime.now()
         current_time = now.strftime("%I:%M %p")
         current_date = now.strftime("%A, %d %B %Y")
-        if "time" in user_text or "baje" in user_text or "samay" in user_text:
-            say(f"Abhi {current_time} baj rahe hain.")
+        if fast_intent == "time":
+            voice.say_template("time", hour=now.hour % 12 or 12, minute=now.minute,
+                               meridiem="AM" if now.hour < 12 else "PM")
             print(f"🕒 Time: {current_time}")
         else:
             say(f"Aaj {current_date} hai.")
             print(f"📅 Date: {current_date}")
         return
 
+    # Exit
+    if fast_intent == "exit":
+        say("Goodbye! Chacha band ho raha hai.").wait(timeout=10)
+        return "exit"
+
+    # 🔋 Battery status
+    if fast_intent == "battery":
+        battery = psutil.sensors_battery()
+        if battery:
+            percent = int(battery.percent)
+            charging = "charging ho rahi hai" if battery.power_plugged else "charging nahi ho rahi hai"
+            voice.say_template("battery", number=percent, charging=charging)
+            print(f"🔋 Battery: {percent}% | {charging}")
+        else:
+            say("Battery information mil nahi rahi hai.")
+        return
+
+    # ▶️ YouTube
+    if fast_intent == "youtube_search":
+        chrome_control.auto_search(user_text, ctx=ctx)
+        return
 
-    # 💬 AI understanding via Gemini
+    # 💬 AI understanding via Gemini (only when the router abstains)
     ai_data = {}
     intent = "chat"
     target = ""
     contact = None
+    spec = None if routed else speculator.speculate(user_text)
+    if not routed and not warmup.wait("gemini", timeout=GEMINI_WAIT):
+        # Gemini still loading: answer from the local model if it is confident
+        routed = intent_classifier.guess(user_text)
+        if routed:
+            ctx.set_intent(routed, "local")
     try:
-        ai_data = gemini_ai.get_gemini_json(user_text)
+        ai_data = routed or gemini_ai.get_gemini_json(user_text, ctx=ctx)
         intent = ai_data.get("intent", "chat")
         target = ai_data.get("message_text") or ""
         contact = ai_data.get("contact_name")
     except Exception as e:
         print("⚠️ Gemini JSON error:", e)
 
-    print(f"🧩 Intent: {intent} | target: {target} | contact: {contact}")
-
-    # Exit
-    if any(w in user_text for w in ["exit", "quit", "band kar", "goodbye", "stop program"]):
-        say("Goodbye! Chacha band ho raha hai.")
-        return "exit"
+    print(f"🧩 Intent: {intent} | target: {target} | contact: {contact}"
+          f"{' (local)' if routed else ''}")
+    speculator.resolve(spec, intent)
 
     # WhatsApp
     if intent == "send_message":
@@ -136,42 +290,24 @@ def process_command(user_input: str):
         system_control.open_app(app_name)
         return
 
-    # System controls
-    if intent == "take_screenshot": system_control.take_screenshot(); return
-    if intent == "lock_pc": system_control.lock_pc(); return
-    if intent == "shutdown_pc": system_control.shutdown_pc(); return
-    if intent == "restart_pc": system_control.restart_pc(); return
-    if intent == "open_settings": system_control.open_settings(); return
-
-    # 🔋 Battery status
-    if any(k in user_text for k in ["battery", "charge", "battery status", "kitni battery", "charging hai ya nahi"]):
-        battery = psutil.sensors_battery()
-        if battery:
-            percent = int(battery.percent)
-            charging = "charging ho rahi hai" if battery.power_plugged else "charging nahi ho rahi hai"
-            say(f"Battery {percent} percent hai aur {charging}.")
-            print(f"🔋 Battery: {percent}% | {charging}")
-        else:
-            say("Battery information mil nahi rahi hai.")
-        return
-
-    # 🎵 Music controls
-    if "youtube" in user_text:
-        chrome_control.auto_search(user_text)
+    # System + 🎵 music controls
+    if registry.handles(intent):
+        if intent in _NEEDS:
+            warmup.wait(_NEEDS[intent], timeout=MIXER_WAIT)
+        registry.dispatch(intent)
         return
-    if intent == "play_music": music_control.play_track(0); return
-    if intent == "next_music": music_control.play_next(); return
-    if intent == "stop_music": music_control.stop_music(); return
-    if intent == "resume_music": music_control.resume_music(); return
-    if intent == "pause_music": music_control.pause_music(); return
 
     # 📷 Object Detection
-    if any(k in user_text for k in
-           ["ye kya", "what is this", "dekho ye kya", "batado ye", "chacha ye kya", "mere haath me kya",
-            "dekho yah kya hai"]):
+    if intent == "detect_object":
         try:
             say("Camera chalu kar raha hoon, ek second...")
-            iobj.start_camera_background()
+            iobj.start_camera_background(wait=False)
+            if warmup.warming("yolo"):
+                say("Detection model abhi load ho raha hai, thoda ruko.")
+                if not warmup.wait("yolo", timeout=YOLO_WAIT):
+                    say("Detection model abhi ready nahi hai, thodi der baad try karo.")
+                    return
+            iobj.wait_for_frame(1.0)
             time.sleep(0.5)
             iobj.ask_and_describe()
         except Exception as e:
@@ -181,10 +317,13 @@ def process_command(user_input: str):
 
     # 🌐 Search / Website
     if intent in ("search", "open_website", "browse", "google_search", "youtube_search"):
-        chrome_control.auto_search(target or user_text)
+        chrome_control.auto_search(target or user_text, ctx=ctx)
         return
 
-    # 🤖 Default Chat
+    # 🤖 Default Chat (the combined classification may already carry the reply)
+    if intent == "chat" and ctx.reply:
+        gemini_ai.speak_reply(user_text, ctx.reply)
+        return
     gemini_ai.get_gemini_response(user_text, speak=True)
     return
 
@@ -192,18 +331,79 @@ def process_command(user_input: str):
 # ----------------------------------------------------------
 # 🏁 Main Loop
 # ----------------------------------------------------------
-def main():
+def _startup_profile():
+    """Report import cost and time-to-first-listen, then the cost of each deferred module."""
+    stream = audio_stream.get_audio_stream()
+    ttfl = time.perf_counter() - _T_START
+    print_import_report("Imports before first listen")
+    print(f"   {'time-to-first-listen':<34} {ttfl * 1000:8.1f} ms")
+    stream.stop()
+
+    deferred = [name for name, mod in registry.modules().items() if not mod.loaded]
+    before = set(import_times)
+    for name in deferred:
+        try:
+            registry.lazy(name).load()
+        except Exception as e:
+            print(f"   {name:<34} failed: {e}")
+    print_import_report("Deferred handler modules (paid only when their intent fires)",
+                        names=set(import_times) - before)
+
+
+def main(argv=None):
+    global ASR_BACKEND
+    parser = argparse.ArgumentParser(description="Chacha voice assistant")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="print per-module import time and time-to-first-listen, then exit")
+    parser.add_argument("--asr", choices=sorted(asr_backends.BACKENDS), default=ASR_BACKEND,
+                        help="speech recognition backend (default: %(default)s)")
+    parser.add_argument("--wav", help="read audio from a 16-bit WAV file instead of the microphone")
+    parser.add_argument("--prompt-tokens", metavar="CSV", default=os.environ.get("CHACHA_PROMPT_TOKENS_CSV"),
+                        help="on exit, write the chat prompt size per turn to this CSV")
+    args = parser.parse_args(argv)
+
+    ASR_BACKEND = args.asr
+    audio_stream.set_audio_stream(audio_stream.AudioStream(
+        wav_path=args.wav, realtime=bool(args.wav), asr=get_asr(),
+        on_partial=lambda text: print(f"   … {text}", end="\r"),
+        is_muted=voice.is_speaking,
+        on_barge_in=voice.barge_in,
+    ).start())
+
     say("नमस्ते, मैं चाचा हूँ! बताइए, आपकी क्या मदद कर सकता हूँ?")
+    if args.startup_profile:
+        _startup_profile()
+        return
+    warmup.start()
     print("✅ Chacha is online and ready.")
 
-    while True:
-        query = listen_once(timeout=10, phrase_time_limit=8)
-        if query == "none":
-            continue
-        result = process_command(query)
-        if result == "exit":
-            break
-        time.sleep(0.2)
+    # capture keeps running while a command (or its speech) is in progress
+    pipeline = CommandPipeline(
+        listen_fn=lambda: listen_once(timeout=10, phrase_time_limit=8),
+        process_fn=process_command,
+    ).start()
+    pipeline.wait()
+    voice.flush(timeout=10)
+    print("📊 Pipeline:", pipeline.metrics())
+    print("📊 Speech:", {k: f"{v * 1000:.0f} ms" if k.startswith("avg") else v
+                         for k, v in voice.speech_metrics().items()})
+    print("📊 Speech wait by priority:", {k: f"{v * 1000:.0f} ms" for k, v in voice.priority_waits().items()})
+    for line in voice.backend_report():
+        print("📊 TTS", line)
+    print("📊 Template speech:", voice.templates.stats)
+    print("📊 TTS cache:", voice.tts_cache.stats, f"| hit rate {voice.tts_cache.hit_rate():.0%}")
+    print("📊 Prefetch:", speculator.stats, f"| hit rate {speculator.hit_rate():.0%}")
+    print("📊 Warm-up:", {k: f"{v * 1000:.0f} ms" for k, v in warmup.durations.items()})
+    if gemini_ai.loaded:
+        print("📊 NLU:", request_context.stats, "| Gemini JSON calls:", gemini_ai.stats["json_calls"],
+              "| chat round trips saved:", gemini_ai.stats["round_trips_saved"])
+        print("📊 Gemini intent calls:", gemini_ai.json_metrics())
+        print("📊 Gemini stream:", gemini_ai.stream_metrics())
+        print("📊 Chat memory:", gemini_ai.memory.metrics())
+        if args.prompt_tokens:
+            gemini_ai.memory.export_prompt_tokens(args.prompt_tokens)
+            print("📊 Chat prompt tokens per turn written to", args.prompt_tokens)
+        print("📊 Gemini client:", gemini_ai.client.report())
 
 
 if __name__ == "__main__":
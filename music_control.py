@@ -2,7 +2,7 @@ import os
 import time
 import random
 from pathlib import Path
-from threading import Thread
+from threading import Lock, Thread
 import pygame
 # ----------------------------------------------------------
 # 🖥️ System Volume Control (Windows)
@@ -21,17 +21,21 @@ volume_level = 0.7  # default 70%
 # ----------------------------------------------------------
 # 🎚️ Mixer Initialization
 # ----------------------------------------------------------
+_mixer_lock = Lock()
+
+
 def init_mixer():
-    """Initialize pygame mixer once."""
+    """Initialize pygame mixer once (safe from the warm-up thread too)."""
     global music_initialized
-    if not music_initialized:
-        try:
-            pygame.mixer.init()
-            pygame.mixer.music.set_volume(volume_level)
-            music_initialized = True
-            print("✅ Music mixer initialized.")
-        except Exception as e:
-            print("❌ Mixer init error:", e)
+    with _mixer_lock:
+        if not music_initialized:
+            try:
+                pygame.mixer.init()
+                pygame.mixer.music.set_volume(volume_level)
+                music_initialized = True
+                print("✅ Music mixer initialized.")
+            except Exception as e:
+                print("❌ Mixer init error:", e)
 
 
 # ----------------------------------------------------------
@@ -0,0 +1,169 @@
+# object_descriptions.py
+# ----------------------------------------------------------
+# Spoken descriptions of YOLO (COCO) classes for Chacha
+# - table {language: {class name: one sentence}} shipped as
+#   data/object_descriptions.json, loaded once at import
+# - entries Gemini adds at runtime for unknown classes go to a
+#   small per-user overlay file, so they are fetched only once
+# - build the shipped table offline:
+#     python object_descriptions.py build --lang en
+# ----------------------------------------------------------
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "object_descriptions.json")
+USER_PATH = os.environ.get(
+    "CHACHA_OBJECT_DESCRIPTIONS", str(Path.home() / ".chacha" / "object_descriptions.json"))
+DEFAULT_LANG = "en"
+
+# Gemini prompt per language (build command and runtime refresh)
+PROMPTS = {
+    "en": "Briefly describe what a {name} is and one common use in one short sentence.",
+    "hinglish": "Ek chhote Hinglish sentence mein batao ki {name} kya hota hai aur uska ek aam use.",
+}
+
+# yolov8n.pt class names (COCO)
+COCO_CLASSES = [
+    "person", "bicycle", "car", "motorcycle", "airplane", "bus", "train", "truck", "boat",
+    "traffic light", "fire hydrant", "stop sign", "parking meter", "bench", "bird", "cat", "dog",
+    "horse", "sheep", "cow", "elephant", "bear", "zebra", "giraffe", "backpack", "umbrella",
+    "handbag", "tie", "suitcase", "frisbee", "skis", "snowboard", "sports ball", "kite",
+    "baseball bat", "baseball glove", "skateboard", "surfboard", "tennis racket", "bottle",
+    "wine glass", "cup", "fork", "knife", "spoon", "bowl", "banana", "apple", "sandwich", "orange",
+    "broccoli", "carrot", "hot dog", "pizza", "donut", "cake", "chair", "couch", "potted plant",
+    "bed", "dining table", "toilet", "tv", "laptop", "mouse", "remote", "keyboard", "cell phone",
+    "microwave", "oven", "toaster", "sink", "refrigerator", "book", "clock", "vase", "scissors",
+    "teddy bear", "hair drier", "toothbrush",
+]
+
+stats = {"hits": 0, "misses": 0, "refreshed": 0}
+
+
+def _read(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"⚠️ Object descriptions {path} unreadable:", e)
+        return {}
+
+
+def _write(path, table):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    tmp = f"{path}.{threading.get_ident()}.part"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(table, f, ensure_ascii=False, indent=0, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def _load():
+    table = _read(DATA_PATH)
+    for lang, entries in _read(USER_PATH).items():
+        table.setdefault(lang, {}).update(entries)
+    return table
+
+
+_t0 = time.perf_counter()
+_table = _load()
+load_seconds = time.perf_counter() - _t0
+_user = _read(USER_PATH)
+_lock = threading.Lock()
+_refreshing = set()
+
+
+def describe(name: str, lang: str = DEFAULT_LANG):
+    """The stored sentence for a class name, or None."""
+    desc = _table.get(lang, {}).get(name)
+    stats["hits" if desc else "misses"] += 1
+    return desc
+
+
+def store(name: str, desc: str, lang: str = DEFAULT_LANG):
+    """Remember a description (e.g. fetched from Gemini) in memory and in the user overlay."""
+    with _lock:
+        _table.setdefault(lang, {})[name] = desc
+        _user.setdefault(lang, {})[name] = desc
+        try:
+            _write(USER_PATH, _user)
+        except Exception as e:
+            print("⚠️ Object description not saved:", e)
+
+
+def refresh(name: str, fetch, lang: str = DEFAULT_LANG):
+    """fetch(prompt) -> text or None; store the result. Returns the description or None."""
+    desc = fetch(PROMPTS[lang].format(name=name))
+    if desc:
+        stats["refreshed"] += 1
+        store(name, desc, lang)
+    return desc
+
+
+def refresh_in_background(name: str, fetch, lang: str = DEFAULT_LANG):
+    """refresh() on a daemon thread, at most once at a time per (name, lang)."""
+    with _lock:
+        if (name, lang) in _refreshing:
+            return
+        _refreshing.add((name, lang))
+
+    def run():
+        try:
+            refresh(name, fetch, lang)
+        finally:
+            with _lock:
+                _refreshing.discard((name, lang))
+
+    threading.Thread(target=run, name="describe-refresh", daemon=True).start()
+
+
+def missing(classes=COCO_CLASSES, lang: str = DEFAULT_LANG):
+    return [c for c in classes if c not in _table.get(lang, {})]
+
+
+# ----------------------------------------------------------
+# 🛠️ Offline build of the shipped table
+# ----------------------------------------------------------
+def build(fetch, lang=DEFAULT_LANG, classes=COCO_CLASSES, force=False, path=DATA_PATH):
+    """Fill data/object_descriptions.json for `lang` with fetch(prompt); returns entries added."""
+    table = _read(path)
+    entries = table.setdefault(lang, {})
+    added = 0
+    for name in classes:
+        if name in entries and not force:
+            continue
+        desc = fetch(PROMPTS[lang].format(name=name))
+        if not desc:
+            print(f"✗ {name}: no description")
+            continue
+        entries[name] = " ".join(desc.split())
+        added += 1
+        print(f"✓ {name}: {entries[name]}")
+    _write(path, table)
+    return added
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Chacha object description table")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_build = sub.add_parser("build", help="ask Gemini for every COCO class not in the table yet")
+    p_build.add_argument("--lang", default=DEFAULT_LANG, choices=sorted(PROMPTS))
+    p_build.add_argument("--force", action="store_true", help="re-fetch entries that already exist")
+    p_build.add_argument("-o", "--output", default=DATA_PATH)
+    p_missing = sub.add_parser("missing", help="list COCO classes without a description")
+    p_missing.add_argument("--lang", default=DEFAULT_LANG)
+    args = parser.parse_args()
+
+    if args.cmd == "build":
+        import gemini_ai
+        added = build(gemini_ai.get_gemini_text, args.lang, force=args.force, path=args.output)
+        print(f"✅ {added} descriptions added → {args.output}")
+    else:
+        print(missing(lang=args.lang) or "none missing")
+        print(f"loaded in {load_seconds * 1e6:.0f} µs")
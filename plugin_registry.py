@@ -0,0 +1,88 @@
+# plugin_registry.py
+# ----------------------------------------------------------
+# Lazy command-handler registry for Chacha
+# - intents declare which module / function handles them
+# - a handler module is imported the first time it is needed
+#   (YOLO, pygame, pyautogui, Gemini stay out of the startup path)
+# - every import is timed for `main_assistant.py --startup-profile`
+# ----------------------------------------------------------
+
+import importlib
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# module name -> seconds spent importing it (first import only)
+import_times = OrderedDict()
+_import_lock = threading.RLock()
+
+
+def timed_import(name: str):
+    """importlib.import_module that records how long the first import took."""
+    if name in sys.modules:
+        return sys.modules[name]
+    with _import_lock:
+        if name in sys.modules:
+            return sys.modules[name]
+        t0 = time.perf_counter()
+        module = importlib.import_module(name)
+        import_times[name] = time.perf_counter() - t0
+        return module
+
+
+class LazyModule:
+    """Stands in for a module; the real import happens on first attribute access."""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def load(self):
+        if self._module is None:
+            self._module = timed_import(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self.load(), attr)
+
+    def __repr__(self):
+        return f"<LazyModule {self._name} ({'loaded' if self.loaded else 'deferred'})>"
+
+
+class HandlerRegistry:
+    """intent -> (module, function, fixed args); modules load on first dispatch."""
+
+    def __init__(self):
+        self._handlers = {}
+        self._modules = {}
+
+    def lazy(self, module: str) -> LazyModule:
+        if module not in self._modules:
+            self._modules[module] = LazyModule(module)
+        return self._modules[module]
+
+    def register(self, intent: str, module: str, func: str, *args):
+        self.lazy(module)
+        self._handlers[intent] = (module, func, args)
+
+    def handles(self, intent: str) -> bool:
+        return intent in self._handlers
+
+    def dispatch(self, intent: str, *args):
+        module, func, fixed = self._handlers[intent]
+        return getattr(self.lazy(module), func)(*fixed, *args)
+
+    def modules(self):
+        return dict(self._modules)
+
+
+def print_import_report(title="Startup profile", names=None):
+    print(f"\n⏱️ {title}")
+    for name, seconds in import_times.items():
+        if names is None or name in names:
+            print(f"   {name:<34} {seconds * 1000:8.1f} ms")
@@ -0,0 +1,94 @@
+# prefetch.py
+# ----------------------------------------------------------
+# Speculative resource prefetch for Chacha
+# - while Gemini classifies, a cheap local guess starts the slow side
+#   effect the command will probably need (camera, playlist, Chrome)
+# - when the real intent arrives the speculation is either used (hit)
+#   or released (waste); counters help tune the confidence thresholds
+# ----------------------------------------------------------
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import intent_classifier
+
+
+class _Resource:
+    def __init__(self, name, intents, start, release, min_conf):
+        self.name = name
+        self.intents = set(intents)
+        self.start = start          # () -> token passed to release
+        self.release = release      # (token) -> None, undo what start did
+        self.min_conf = min_conf
+
+
+class Speculation:
+    def __init__(self, resource, guessed_intent, confidence, future):
+        self.resource = resource
+        self.guessed_intent = guessed_intent
+        self.confidence = confidence
+        self.future = future
+        self.resolved = False
+
+
+class Speculator:
+    def __init__(self, max_workers=2):
+        self._resources = []
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        self.stats = {}
+
+    def register(self, name, intents, start, release=None, min_conf=0.4):
+        self._resources.append(_Resource(name, intents, start, release, min_conf))
+        self.stats[name] = {"started": 0, "hits": 0, "wasted": 0}
+
+    def _count(self, name, key):
+        with self._lock:
+            self.stats[name][key] += 1
+
+    def speculate(self, user_text):
+        """Start the likely resource in the background; None if nothing looks likely."""
+        clf = intent_classifier.get_classifier()
+        if clf is None:
+            return None
+        intent, conf = clf.predict(user_text)
+        for res in self._resources:
+            if intent in res.intents and conf >= res.min_conf:
+                print(f"🔮 Prefetch {res.name} (guess {intent} {conf:.2f})")
+                self._count(res.name, "started")
+                return Speculation(res, intent, conf, self._pool.submit(res.start))
+        return None
+
+    def resolve(self, spec, final_intent, wait_timeout=5.0):
+        """
+        Record a hit (and wait for the prefetch to finish so the handler
+        doesn't redo it), or release the resource when the intent differs.
+        """
+        if spec is None or spec.resolved:
+            return
+        spec.resolved = True
+        res = spec.resource
+        if final_intent in res.intents:
+            self._count(res.name, "hits")
+            try:
+                spec.future.result(timeout=wait_timeout)
+            except Exception:
+                pass
+            return
+        self._count(res.name, "wasted")
+        print(f"🔮 Prefetch {res.name} wasted (final intent {final_intent})")
+        if res.release is not None:
+            spec.future.add_done_callback(lambda f: self._release(res, f))
+
+    @staticmethod
+    def _release(res, future):
+        try:
+            if future.exception() is None:
+                res.release(future.result())
+        except Exception as e:
+            print(f"⚠️ Prefetch release {res.name} error:", e)
+
+    def hit_rate(self):
+        started = sum(s["started"] for s in self.stats.values())
+        hits = sum(s["hits"] for s in self.stats.values())
+        return hits / started if started else 0.0
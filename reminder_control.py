@@ -1,11 +1,11 @@
 import time
 import threading
-from voice import say
+from voice import say, say_template, ALERT
 
 def set_reminder(delay_seconds: int, message: str):
     """Set a reminder after specific seconds."""
     try:
-        say(f"ठीक है, मैं {delay_seconds} सेकंड बाद याद दिला दूँगा.")
+        say_template("reminder_set", number=delay_seconds)
         print(f"⏱️ Reminder set for {delay_seconds} seconds: {message}")
         threading.Timer(delay_seconds, trigger_reminder, args=[message]).start()
     except Exception as e:
@@ -14,7 +14,7 @@ def set_reminder(delay_seconds: int, message: str):
 
 def trigger_reminder(message: str):
     """Speak reminder when time is up."""
-    say(f"⏰ याद दिलाना: {message}")
+    say(f"⏰ याद दिलाना: {message}", priority=ALERT)
     print(f"🔔 Reminder Triggered: {message}")
 
 
@@ -0,0 +1,58 @@
+# request_context.py
+# ----------------------------------------------------------
+# Per-utterance context for Chacha
+# Carries the parsed intent, query and timings through the handlers,
+# so one utterance is classified (at most) once.
+# ----------------------------------------------------------
+
+import time
+from contextlib import contextmanager
+
+# process-wide counters
+stats = {"requests": 0, "nlu_calls": 0, "repeat_nlu": 0}
+
+
+class RequestContext:
+    def __init__(self, utterance: str):
+        self.utterance = utterance
+        self.intent = None
+        self.query = None
+        self.contact = None
+        self.reply = None           # chat reply from a combined classification, if any
+        self.source = None          # "router", "cache", "gemini", "fallback", ...
+        self.nlu_calls = 0
+        self.timings = {}
+        self._t0 = time.perf_counter()
+        stats["requests"] += 1
+
+    def set_intent(self, data: dict, source: str):
+        """Store a get_gemini_json-style result on the context."""
+        self.intent = data.get("intent")
+        self.query = data.get("message_text") or self.utterance
+        self.contact = data.get("contact_name")
+        self.reply = data.get("reply")
+        self.source = source
+
+    def count_nlu(self):
+        """Call right before a classification request goes out."""
+        self.nlu_calls += 1
+        stats["nlu_calls"] += 1
+        if self.nlu_calls > 1:
+            stats["repeat_nlu"] += 1
+            print(f"⚠️ Utterance classified {self.nlu_calls} times: {self.utterance!r}")
+
+    @contextmanager
+    def timed(self, name: str):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - t
+
+    def mark(self, name: str):
+        """Record time since the utterance arrived."""
+        self.timings[name] = time.perf_counter() - self._t0
+
+    def summary(self):
+        parts = " ".join(f"{k}={v * 1000:.0f}ms" for k, v in self.timings.items())
+        return f"intent={self.intent} via {self.source} | nlu_calls={self.nlu_calls} | {parts}"
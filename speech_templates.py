@@ -0,0 +1,185 @@
+# speech_templates.py
+# ----------------------------------------------------------
+# Spliced speech for parameterized phrases
+# - a template is fixed text around slots:
+#     "Awaaz {number} percent kar di."
+# - the fixed segments and every slot value (numbers 0–100,
+#   clock hours / minutes, ...) are rendered once to PCM and
+#   kept on disk next to the TTS cache
+# - at runtime the PCM segments are joined with short crossfades:
+#   no synthesis, no network
+# ----------------------------------------------------------
+
+import re
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from tts_cache import TTSCache, cache_key, CACHE_DIR
+
+SAMPLE_RATE = 24000
+CROSSFADE_MS = 12       # overlap between neighbouring segments
+PAD_MS = 40             # silence kept before / after each trimmed segment
+SILENCE_LEVEL = 300     # |sample| below this counts as silence when trimming
+TEMPLATE_DIR = str(Path(CACHE_DIR) / "templates")
+
+# slot name -> {value as str: spoken text}; "" means the slot is left out
+SLOTS = {
+    "number": {str(i): str(i) for i in range(101)},
+    "hour": {str(h): str(h) for h in range(1, 13)},
+    "minute": {"0": "", **{str(m): f"{m:02d}" for m in range(1, 60)}},
+    "meridiem": {"AM": "AM", "PM": "PM"},
+    "charging": {t: t for t in ("charging ho rahi hai", "charging nahi ho rahi hai")},
+}
+
+TEMPLATES = {
+    "volume": "Awaaz {number} percent kar di.",
+    "time": "Abhi {hour} {minute} {meridiem} baj rahe hain.",
+    "battery": "Battery {number} percent hai aur {charging}.",
+    "reminder_set": "ठीक है, मैं {number} सेकंड बाद याद दिला दूँगा.",
+}
+
+_SLOT = re.compile(r"\{(\w+)\}")
+_SPEAKABLE = re.compile(r"\w")                     # a segment without letters / digits is not rendered
+_SPACE_BEFORE_PUNCT = re.compile(r"\s+(?=[.,!?;:।])")
+
+
+def trim_silence(pcm, sample_rate=SAMPLE_RATE, level=SILENCE_LEVEL, pad_ms=PAD_MS):
+    """Cut leading / trailing silence of int16 PCM, keeping pad_ms on both sides."""
+    loud = np.flatnonzero(np.abs(pcm.astype(np.int32)) > level)
+    if loud.size == 0:
+        return pcm[:0]
+    pad = int(sample_rate * pad_ms / 1000)
+    return pcm[max(0, loud[0] - pad):loud[-1] + pad + 1]
+
+
+def crossfade_join(segments, sample_rate=SAMPLE_RATE, crossfade_ms=CROSSFADE_MS) -> bytes:
+    """Concatenate int16 PCM segments, overlapping neighbours with a linear crossfade."""
+    n = int(sample_rate * crossfade_ms / 1000)
+    parts = []
+    tail = None
+    for seg in segments:
+        seg = seg.astype(np.float32)
+        if tail is not None:
+            k = min(n, len(tail), len(seg))
+            if k:
+                ramp = np.linspace(0.0, 1.0, k, dtype=np.float32)
+                seg = seg.copy()
+                seg[:k] = tail[len(tail) - k:] * (1.0 - ramp) + seg[:k] * ramp
+                tail = tail[:len(tail) - k]
+            parts.append(tail)
+        tail = seg
+    if tail is not None:
+        parts.append(tail)
+    if not parts:
+        return b""
+    return np.clip(np.concatenate(parts), -32768, 32767).astype(np.int16).tobytes()
+
+
+class TemplateBank:
+    """
+    Pre-rendered PCM segments for TEMPLATES.
+    render(text) returns mono s16le PCM bytes at sample_rate (or None);
+    it is only called by prerender() / segment(render=True).
+    """
+
+    def __init__(self, render, voice_id, templates=TEMPLATES, slots=SLOTS,
+                 directory=TEMPLATE_DIR, sample_rate=SAMPLE_RATE):
+        self._render = render
+        self.voice_id = voice_id
+        self.templates = templates
+        self.slots = slots
+        self.sample_rate = sample_rate
+        self.cache = TTSCache(directory, ext=".pcm")
+        self._pcm = {}    # text -> int16 array
+        self._lock = threading.Lock()
+        self.stats = {"spliced": 0, "fallback": 0, "rendered": 0, "render_errors": 0}
+
+    def _key(self, text):
+        return cache_key(text, self.voice_id, str(self.sample_rate), "pcm")
+
+    def segment(self, text, render=False):
+        """Trimmed PCM (int16 array) for one segment: memory, disk, or freshly rendered."""
+        pcm = self._pcm.get(text)
+        if pcm is not None:
+            return pcm
+        key = self._key(text)
+        path = self.cache.get(key)
+        if path is not None:
+            pcm = np.frombuffer(path.read_bytes(), dtype=np.int16)
+        elif render:
+            try:
+                raw = self._render(text)
+            except Exception as e:
+                print(f"⚠️ Template segment '{text}' not rendered:", e)
+                raw = None
+            if not raw:
+                self.stats["render_errors"] += 1
+                return None
+            pcm = trim_silence(np.frombuffer(raw, dtype=np.int16), self.sample_rate)
+            if self.cache.dir is not None:
+                self.cache.put_bytes(key, pcm.tobytes())
+            self.stats["rendered"] += 1
+        else:
+            return None
+        with self._lock:
+            self._pcm[text] = pcm
+        return pcm
+
+    def parts(self, name, values):
+        """Spoken pieces of a filled template; None if a value is outside its slot vocabulary."""
+        pieces = _SLOT.split(self.templates[name])
+        out = []
+        for i, piece in enumerate(pieces):
+            if i % 2:
+                spoken = self.slots[piece].get(str(values.get(piece)))
+                if spoken is None:
+                    return None
+            else:
+                spoken = piece.strip()
+            if _SPEAKABLE.search(spoken):
+                out.append(spoken)
+        return out
+
+    def text(self, name, **values) -> str:
+        """The filled template as plain text (what say() would speak)."""
+        def fill(m):
+            value = values.get(m.group(1), "")
+            spoken = self.slots[m.group(1)].get(str(value))
+            return str(value) if spoken is None else spoken
+
+        text = " ".join(_SLOT.sub(fill, self.templates[name]).split())
+        return _SPACE_BEFORE_PUNCT.sub("", text)
+
+    def splice(self, name, **values):
+        """PCM bytes of the filled template, or None if a value / segment is missing."""
+        parts = self.parts(name, values)
+        segments = [self.segment(p) for p in parts] if parts else None
+        if not segments or any(s is None for s in segments):
+            self.stats["fallback"] += 1
+            return None
+        self.stats["spliced"] += 1
+        return crossfade_join(segments, self.sample_rate)
+
+    def vocabulary(self, names=None):
+        """Every text segment the templates (or just `names`) can need."""
+        texts = []
+        for name in names or list(self.templates):
+            pieces = _SLOT.split(self.templates[name])
+            for i, piece in enumerate(pieces):
+                for t in self.slots[piece].values() if i % 2 else [piece.strip()]:
+                    if _SPEAKABLE.search(t) and t not in texts:
+                        texts.append(t)
+        return texts
+
+    def missing(self, names=None):
+        return [t for t in self.vocabulary(names) if not self.cache.contains(self._key(t))]
+
+    def prerender(self, names=None) -> int:
+        """Render every segment not on disk yet; returns how many were rendered."""
+        done = 0
+        for text in self.missing(names):
+            if self.segment(text, render=True) is not None:
+                done += 1
+        return done
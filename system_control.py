@@ -33,7 +33,7 @@ def open_settings():
 
 def lock_pc():
     try:
-        say("Locking the computer now.")
+        say("Locking the computer now.").wait(timeout=5)
         subprocess.call("rundll32.exe user32.dll,LockWorkStation")
     except Exception as e:
         print("❌ lock_pc error:", e)
@@ -49,7 +49,7 @@ def shutdown_pc():
 
 def restart_pc():
     try:
-        say("Restarting system now.")
+        say("Restarting system now.").wait(timeout=5)
         subprocess.Popen("shutdown /r /t 5", shell=True)
     except Exception as e:
         print("❌ restart_pc error:", e)
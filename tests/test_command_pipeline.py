@@ -0,0 +1,26 @@
+import threading
+
+from command_pipeline import CommandPipeline, UtteranceQueue
+
+
+def test_repeated_command_is_queued_twice():
+    q = UtteranceQueue()
+    assert q.put("next song") and q.put("next song")
+    assert [q.get(timeout=0)[0] for _ in range(2)] == ["next song", "next song"]
+
+
+def test_repeated_commands_are_both_dispatched():
+    heard = iter(["volume kam karo", "volume kam karo", "exit"])
+    done = []
+    finished = threading.Event()
+
+    def process(text):
+        done.append(text)
+        if text == "exit":
+            finished.set()
+            return "exit"
+
+    pipeline = CommandPipeline(lambda: next(heard, "none"), process).start()
+    assert finished.wait(2)
+    pipeline.stop()
+    assert done == ["volume kam karo", "volume kam karo", "exit"]
@@ -0,0 +1,48 @@
+import pytest
+
+from intent_cache import UNCACHEABLE_INTENTS, IntentCache
+
+SIDE_EFFECTS = ["lock_pc", "shutdown_pc", "restart_pc", "take_screenshot", "send_message"]
+TEXT = "computer band kar do"
+
+
+def _result(intent):
+    return {"intent": intent, "contact_name": None, "message_text": None}
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "intents.sqlite")
+
+
+def test_side_effect_intents_are_uncacheable():
+    assert set(SIDE_EFFECTS) <= UNCACHEABLE_INTENTS
+
+
+@pytest.mark.parametrize("intent", SIDE_EFFECTS)
+def test_side_effect_intent_is_never_written(path, intent):
+    cache = IntentCache(path=path)
+    cache.put(TEXT, _result(intent))
+    assert cache.get(TEXT) is None
+    assert cache.stats["stores"] == 0 and cache.stats["skipped"] == 1
+    # nothing reached the disk tier either
+    assert IntentCache(path=path).get(TEXT) is None
+
+
+@pytest.mark.parametrize("intent", SIDE_EFFECTS)
+def test_side_effect_intent_stored_by_an_older_version_is_never_read(path, intent):
+    old = IntentCache(path=path, uncacheable={"send_message"} - {intent})
+    old.put(TEXT, _result(intent))
+    assert old.get(TEXT)["intent"] == intent
+    assert IntentCache(path=path).get(TEXT) is None
+
+
+def test_contact_names_are_never_cached(path):
+    cache = IntentCache(path=path)
+    cache.put("rahul ko hello bolo", {"intent": "chat", "contact_name": "rahul", "message_text": "hello"})
+    assert cache.get("rahul ko hello bolo") is None
+
+
+def test_plain_intent_is_cached_on_disk(path):
+    IntentCache(path=path).put("gaana chalao", _result("play_music"))
+    assert IntentCache(path=path).get("Gaana chalao")["intent"] == "play_music"
@@ -0,0 +1,45 @@
+import pytest
+
+from intent_router import route
+
+
+@pytest.mark.parametrize("text", [
+    "band karo", "band kardo", "chacha band karo", "program band karo", "Chacha band kar do",
+    "exit", "goodbye chacha", "चाचा बंद करो",
+])
+def test_exit_phrases(text):
+    assert route(text)["intent"] == "exit"
+
+
+@pytest.mark.parametrize("text, intent", [
+    ("music band karo", "stop_music"),
+    ("gaana band karo", "stop_music"),
+    ("awaaz band karo", "set_volume"),
+    ("volume band kardo", "set_volume"),
+    ("गाना बंद करो", "stop_music"),
+])
+def test_band_karo_with_a_target_is_not_exit(text, intent):
+    assert route(text)["intent"] == intent
+
+
+def test_bandh_inside_other_words_does_not_exit():
+    assert route("bandar kaisa hota hai") is None
+
+
+@pytest.mark.parametrize("text", [
+    "reminder set karo 5 minute baad", "reminder lagao 10 second", "reminder laga do kal ke liye",
+    "reminder set kar do 2 minute", "set a reminder for 5 minutes", "remind me in 5 minutes",
+    "mujhe 5 minute baad yaad dilana", "alarm set karo 6 baje", "timer lagao 30 second",
+])
+def test_reminder_phrases(text):
+    assert route(text)["intent"] == "set_reminder"
+
+
+@pytest.mark.parametrize("text", ["music resume karo", "gaana resume karo", "resume music", "unpause"])
+def test_resume_needs_music_context(text):
+    assert route(text)["intent"] == "resume_music"
+
+
+def test_resume_without_music_is_not_resume_music():
+    r = route("resume likhne me help karo")
+    assert r is None or r["intent"] != "resume_music"
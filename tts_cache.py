@@ -0,0 +1,106 @@
+# tts_cache.py
+# ----------------------------------------------------------
+# Content-addressed on-disk cache of synthesized speech
+# - key = sha256(backend, voice, rate, text)
+# - encoded audio stored as <key>.mp3, LRU by file mtime
+# - byte budget with eviction, hit/miss stats
+# ----------------------------------------------------------
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+CACHE_DIR = os.environ.get("CHACHA_TTS_CACHE", str(Path.home() / ".chacha" / "tts_cache"))
+CACHE_BUDGET_BYTES = 50 * 1024 * 1024
+
+
+def cache_key(text: str, voice: str, rate: str, backend: str) -> str:
+    raw = "\0".join((backend, voice, rate, text.strip()))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    def __init__(self, directory=CACHE_DIR, budget_bytes=CACHE_BUDGET_BYTES, ext=".mp3"):
+        self.dir = Path(directory)
+        self.budget = budget_bytes
+        self.ext = ext
+        self._lock = threading.Lock()
+        self._index = OrderedDict()   # key -> size, least recently used first
+        self.total_bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        try:
+            self.dir.mkdir(parents=True, exist_ok=True)
+            files = sorted(self.dir.glob(f"*{ext}"), key=lambda p: p.stat().st_mtime)
+            for p in files:
+                size = p.stat().st_size
+                self._index[p.stem] = size
+                self.total_bytes += size
+        except Exception as e:
+            print("⚠️ TTS cache disabled:", e)
+            self.dir = None
+
+    def path_for(self, key: str) -> Path:
+        return self.dir / f"{key}{self.ext}"
+
+    def get(self, key: str):
+        """Path of the cached audio (and mark it recently used) or None."""
+        if self.dir is None:
+            return None
+        with self._lock:
+            if key not in self._index:
+                self.stats["misses"] += 1
+                return None
+            path = self.path_for(key)
+            if not path.exists():
+                self.total_bytes -= self._index.pop(key)
+                self.stats["misses"] += 1
+                return None
+            self._index.move_to_end(key)
+            self.stats["hits"] += 1
+        try:
+            os.utime(path)   # keeps the LRU order across restarts
+        except OSError:
+            pass
+        return path
+
+    def contains(self, key: str) -> bool:
+        return self.dir is not None and key in self._index
+
+    def temp_path(self, key: str) -> Path:
+        """Where a backend should write new audio before put()."""
+        return self.dir / f"{key}.{threading.get_ident()}.part"
+
+    def put(self, key: str, tmp_path) -> Path:
+        """Move a finished temp file into the cache and enforce the byte budget."""
+        path = self.path_for(key)
+        os.replace(tmp_path, path)
+        size = path.stat().st_size
+        with self._lock:
+            self.total_bytes -= self._index.pop(key, 0)
+            self._index[key] = size
+            self.total_bytes += size
+            self.stats["stores"] += 1
+            while self.total_bytes > self.budget and len(self._index) > 1:
+                old_key, old_size = self._index.popitem(last=False)
+                self.total_bytes -= old_size
+                self.stats["evictions"] += 1
+                try:
+                    os.remove(self.path_for(old_key))
+                except OSError:
+                    pass
+        return path
+
+    def put_bytes(self, key: str, data: bytes) -> Path:
+        tmp = self.temp_path(key)
+        with open(tmp, "wb") as f:
+            f.write(data)
+        return self.put(key, tmp)
+
+    def __len__(self):
+        return len(self._index)
+
+    def hit_rate(self) -> float:
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
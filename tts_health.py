@@ -0,0 +1,90 @@
+# tts_health.py
+# ----------------------------------------------------------
+# Health + latency bookkeeping for the speech backends
+# (also the circuit breaker of gemini_client)
+# - a backend that fails MAX_FAILURES times in a row is skipped
+#   for COOLDOWN seconds, then tried again
+# - latency histogram per backend (time to first audio)
+# ----------------------------------------------------------
+
+import threading
+import time
+
+MAX_FAILURES = 3
+COOLDOWN = 30.0
+BUCKETS_MS = (50, 100, 200, 400, 800, 1600, 3200)
+
+
+class LatencyHistogram:
+    def __init__(self, buckets_ms=BUCKETS_MS):
+        self.buckets = list(buckets_ms)
+        self.counts = [0] * (len(self.buckets) + 1)   # last one is "slower than every bucket"
+        self.total = 0
+        self.sum = 0.0
+
+    def add(self, seconds: float):
+        ms = seconds * 1000
+        i = 0
+        while i < len(self.buckets) and ms > self.buckets[i]:
+            i += 1
+        self.counts[i] += 1
+        self.total += 1
+        self.sum += seconds
+
+    def percentile(self, q: float):
+        """Upper bound (ms) of the bucket holding the q-th percentile; None if empty."""
+        if not self.total:
+            return None
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= q / 100 * self.total:
+                return self.buckets[i] if i < len(self.buckets) else float("inf")
+
+    def mean(self):
+        return self.sum / self.total if self.total else 0.0
+
+    def __str__(self):
+        labels = [f"≤{b}" for b in self.buckets] + [f">{self.buckets[-1]}"]
+        return " ".join(f"{label}:{count}" for label, count in zip(labels, self.counts))
+
+
+class BackendHealth:
+    def __init__(self, name, max_failures=MAX_FAILURES, cooldown=COOLDOWN):
+        self.name = name
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self.failures = 0           # consecutive
+        self.skip_until = 0.0
+        self.latency = LatencyHistogram()
+        self.stats = {"ok": 0, "failed": 0, "skipped": 0}
+        self._lock = threading.Lock()
+
+    def available(self) -> bool:
+        return time.monotonic() >= self.skip_until
+
+    def success(self, latency=None):
+        with self._lock:
+            self.failures = 0
+            self.stats["ok"] += 1
+            if latency is not None:
+                self.latency.add(latency)
+
+    def failure(self, reason=""):
+        with self._lock:
+            self.failures += 1
+            self.stats["failed"] += 1
+            if self.failures >= self.max_failures:
+                self.failures = 0
+                self.skip_until = time.monotonic() + self.cooldown
+                print(f"⚠️ {self.name} failed {self.max_failures}x ({reason or 'error'}), "
+                      f"skipping it for {self.cooldown:.0f}s.")
+
+    def skipped(self):
+        with self._lock:
+            self.stats["skipped"] += 1
+
+    def report(self):
+        p50, p95 = self.latency.percentile(50), self.latency.percentile(95)
+        return (f"{self.name}: {self.stats} | mean {self.latency.mean() * 1000:.0f} ms "
+                f"| p50 ≤{p50} ms | p95 ≤{p95} ms | {self.latency}")
@@ -1,54 +1,765 @@
-# voice.py (replace play_mp3, speak_edge_tts, say)
+# voice.py
+# ----------------------------------------------------------
+# Speech output for Chacha
+# - one long-lived speech thread owns a single asyncio loop
+# - say() only enqueues and returns a SpeechHandle (wait() if needed)
+# - edge-tts mp3 chunks are played from memory while they stream in
+#   (audio_output), then cached on disk (tts_cache)
+# - hedged: if edge-tts has no audio within EDGE_DEADLINE the
+#   pre-warmed pyttsx3 engine (own thread) speaks instead
+# - priority queue: alerts cut acknowledgements cut chat cut narration;
+#   stale narration is coalesced, user speech (barge-in) stops playback
+# - queued chat sentences start synthesizing as soon as they are
+#   queued, so a streamed reply plays without gaps between sentences
+# - templated confirmations ("Awaaz {number} percent kar di.") are
+#   spliced from pre-rendered PCM segments (speech_templates)
+# ----------------------------------------------------------
 import os
+import re
 import asyncio
+import textwrap
+import time
 import pyttsx3
 from edge_tts import Communicate
 from playsound import playsound   # pip install playsound
+import queue
 import threading
+from collections import deque
+import audio_output
+from tts_cache import TTSCache, cache_key
+from tts_health import BackendHealth
+from speech_templates import TemplateBank
 
-_speech_lock = threading.Lock()
+EDGE_VOICE = "hi-IN-MadhurNeural"
+EDGE_RATE = "+0%"
+ECHO_TAIL = 0.3     # seconds after playback during which the mic ignores new speech
+CHUNK_MAX_CHARS = 160   # longer sentences are cut at clauses / words
+CHUNK_MIN_CHARS = 20    # shorter pieces ride along with a neighbour
+LOOKAHEAD = 2           # chunks synthesizing ahead of the one being played
+PREFETCH_ITEMS = 2      # queued CHAT items whose first chunks synthesize while another plays
+NARRATION_MAX_AGE = 3.0  # queued narration older than this is not worth saying any more
+EDGE_DEADLINE = float(os.environ.get("CHACHA_TTS_DEADLINE", "1.5"))  # no edge audio by then → offline wins
 
-async def _edge_tts_save(text, filename):
+# Speech priorities (lower = more urgent); a more urgent item cuts the one playing
+ALERT, ACK, CHAT, NARRATION = 0, 1, 2, 3
+PRIORITY_NAMES = {ALERT: "alert", ACK: "ack", CHAT: "chat", NARRATION: "narration"}
+
+# Fixed phrases synthesized into the cache at startup
+PREWARM_PHRASES = [
+    "नमस्ते, मैं चाचा हूँ! बताइए, आपकी क्या मदद कर सकता हूँ?",
+    "Awaaz poori kar di.",
+    "Awaaz kam kar di.",
+    "Theek hai, dekh raha hoon.",
+    "Camera chalu kar raha hoon, ek second...",
+    "Goodbye! Chacha band ho raha hai.",
+    "Contact ya message samajh nahi aaya.",
+    "Battery information mil nahi rahi hai.",
+    "Mujhe kuch clearly nazar nahi aaya. Thoda paas laakar dikhaiye.",
+    "Mujhe samajh nahi aaya kitne time baad ya kya yaad dilana hai.",
+]
+
+tts_cache = TTSCache()
+health = {"edge-tts": BackendHealth("edge-tts"), "pyttsx3": BackendHealth("pyttsx3")}
+
+# ----------------------------------------------------------
+# ✂️ Sentence / clause chunks
+# ----------------------------------------------------------
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|(?<=[।॥])\s*|\n+")
+_CLAUSE_SPLIT = re.compile(r"(?<=[,;:–—])\s+")
+
+
+def split_chunks(text, max_chars=CHUNK_MAX_CHARS, min_chars=CHUNK_MIN_CHARS):
+    """Split at . ! ? । ॥ (then clauses, then words) into speakable chunks."""
+    pieces = []
+    for sentence in _SENTENCE_SPLIT.split(text.strip()):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if len(sentence) <= max_chars:
+            pieces.append(sentence)
+            continue
+        for clause in _CLAUSE_SPLIT.split(sentence):
+            pieces.extend(textwrap.wrap(clause, max_chars))
+    chunks = []
+    for piece in pieces:
+        if chunks and (len(chunks[-1]) < min_chars or len(piece) < min_chars) \
+                and len(chunks[-1]) + 1 + len(piece) <= max_chars:
+            chunks[-1] += " " + piece
+        else:
+            chunks.append(piece)
+    return chunks or [text.strip()]
+
+def _edge_cache_key(text):
+    return cache_key(text, EDGE_VOICE, EDGE_RATE, "edge-tts")
+
+async def _edge_stream(text):
+    """Yield edge-tts mp3 chunks as they arrive."""
+    tts = Communicate(text, voice=EDGE_VOICE, rate=EDGE_RATE)
+    async for chunk in tts.stream():
+        if chunk["type"] == "audio":
+            yield chunk["data"]
+
+async def _synthesize_cached(text, playback=None, got_audio=None):
+    """
+    edge-tts mp3 bytes for text: from the cache, or streamed and then stored.
+    With a playback, every chunk is fed to it as soon as it is known;
+    got_audio (asyncio.Event) is set when the first bytes are there.
+    """
+    key = _edge_cache_key(text)
+    path = tts_cache.get(key)
+    if path is not None:
+        data = path.read_bytes()
+        if playback is not None:
+            playback.feed(data)
+        if got_audio is not None:
+            got_audio.set()
+        return data
+    chunks = []
     try:
-        voice = "hi-IN-MadhurNeural"
-        tts = Communicate(text, voice=voice)
-        await tts.save(filename)
-        return True
+        async for data in _edge_stream(text):
+            chunks.append(data)
+            if playback is not None:
+                playback.feed(data)
+            if got_audio is not None:
+                got_audio.set()
     except Exception as e:
-        print("❌ Edge-TTS save error:", e)
-        return False
+        # whatever arrived may still be played once, but a truncated
+        # phrase must never be stored and replayed from the cache
+        print("❌ Edge-TTS stream error:", e)
+        return b"".join(chunks) or None
+    data = b"".join(chunks)
+    if data and tts_cache.dir is not None:
+        tts_cache.put_bytes(key, data)
+    return data or None
 
-def _speak_offline(text):
-    try:
-        engine = pyttsx3.init()
-        engine.setProperty("rate", 165)
-        engine.say(text)
-        engine.runAndWait()
+async def _replay_synthesis(task, playback=None, got_audio=None):
+    """_synthesize_cached() for a chunk whose synthesis task is already running."""
+    data = await task
+    if data:
+        if playback is not None:
+            playback.feed(data)
+        if got_audio is not None:
+            got_audio.set()
+    return data
+
+def _render_segment(text):
+    """PCM of one template segment, synthesized by edge-tts on the speech loop."""
+    data = _service.run_coroutine(_synthesize_cached(text)).result()
+    return audio_output.decode(data) if data else None
+
+# ----------------------------------------------------------
+# 🏠 Offline engine (own thread, initialized once)
+# ----------------------------------------------------------
+class _OfflineSpeaker:
+    """
+    pyttsx3 is not thread-safe, so one thread owns the engine and speaks
+    queued texts. Other threads never touch the engine: they set a job's
+    stop event and the engine thread stops itself at the next word.
+    """
+
+    def __init__(self):
+        self.engine = None
+        self._jobs = queue.Queue()
+        self._thread = None
+        self._ready = threading.Event()
+        self._start_lock = threading.Lock()
+        self._current = None
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="speech-offline", daemon=True)
+                self._thread.start()
+        self._ready.wait()
+        return self.engine
+
+    def _run(self):
+        try:
+            self.engine = pyttsx3.init()
+            self.engine.setProperty("rate", 165)
+            self.engine.connect("started-utterance", self._on_start)
+            self.engine.connect("started-word", self._on_word)
+        except Exception as e:
+            print("❌ pyttsx3 init error:", e)
+        self._ready.set()
+        while True:
+            job = self._jobs.get()
+            self._current = job
+            try:
+                if self.engine is None:
+                    raise RuntimeError("pyttsx3 engine unavailable")
+                if job["stop"].is_set():
+                    continue
+                self.engine.say(job["text"])
+                self.engine.runAndWait()
+                job["ok"] = True
+            except Exception as e:
+                print("❌ pyttsx3 error:", e)
+            finally:
+                self._current = None
+                job["done"].set()
+
+    def _on_start(self, name=None):
+        job = self._current
+        if job is not None and job["started_at"] is None:
+            job["started_at"] = time.perf_counter()
+
+    def _on_word(self, name=None, location=None, length=None):
+        # engine callback, so engine.stop() runs on the engine's own thread
+        job = self._current
+        if job is not None and job["stop"].is_set():
+            try:
+                self.engine.stop()
+            except Exception as e:
+                print("⚠️ pyttsx3 stop error:", e)
+
+    def speak(self, text, stop=None):
+        """
+        Speak on the engine thread; (ok, seconds until speech started).
+        Setting `stop` (threading.Event) from any thread cuts it at the next word.
+        """
+        self.start()
+        job = {"text": text, "ok": False, "started_at": None, "stop": stop or threading.Event(),
+               "queued_at": time.perf_counter(), "done": threading.Event()}
+        self._jobs.put(job)
+        job["done"].wait()
+        started = job["started_at"] or job["queued_at"]
+        return job["ok"], started - job["queued_at"]
+
+
+_offline = _OfflineSpeaker()
+
+
+def warm_offline_engine():
+    """Start the offline engine thread ahead of time (warm-up)."""
+    return _offline.start()
+
+# ----------------------------------------------------------
+# 🧵 Speech service
+# ----------------------------------------------------------
+class SpeechHandle:
+    """Returned by say(); wait() blocks until the text was spoken (or cut / dropped)."""
+
+    def __init__(self, text, priority=ACK, pcm=None, reply=None):
+        self.text = text
+        self.priority = priority
+        self.pcm = pcm              # spliced template audio, played instead of synthesizing
+        self.reply = reply          # shared by the sentences of one streamed reply
+        self.queued_at = time.perf_counter()
+        self.started_at = None
+        self.synth_time = None
+        self.first_audio = None     # seconds from dequeue to the first audible block
+        self.play_time = None
+        self.backend = None
+        self.chunks = 0
+        self.cancelled = None       # "preempted" / "barge-in" / "coalesced" / "stale"
+        self.prefetched = {}        # chunk index -> synthesis task started while queued
+        self._stoppers = []         # stop() of whatever is producing sound right now
+        self._done = threading.Event()
+
+    def cancel(self, reason):
+        if self.cancelled is None:
+            self.cancelled = reason
+        for stop in list(self._stoppers):
+            stop()
+
+    def _on_cancel(self, stop):
+        self._stoppers.append(stop)
+        if self.cancelled is not None:
+            stop()
+
+    def _release_output(self):
+        """Stop and forget the current sound producers (before another backend takes over)."""
+        stoppers, self._stoppers = self._stoppers, []
+        for stop in stoppers:
+            stop()
+
+    def wait(self, timeout=None) -> bool:
+        return self._done.wait(timeout)
+
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def queue_wait(self):
+        return None if self.started_at is None else self.started_at - self.queued_at
+
+
+class _SpeechService:
+    def __init__(self):
+        self._loop = None
+        self._queue = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._start_lock = threading.Lock()
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+        self._idle = threading.Event()
+        self._idle.set()
+        self.speaking = threading.Event()
+        self.last_spoken_end = 0.0
+        self._seq = 0
+        self._current = None
+        self._queued_narration = []
+        self._queued_chat = []      # CHAT handles in submit order, until dequeued
+        self._preempted_replies = deque(maxlen=16)
+        self.stats = {"spoken": 0, "offline": 0, "errors": 0, "preempted": 0, "barge_in": 0,
+                      "dropped": 0, "prefetched": 0, "queue_wait": 0.0, "first_audio": 0.0, "synth": 0.0, "play": 0.0}
+        self.wait_by_priority = {name: [0, 0.0] for name in PRIORITY_NAMES.values()}  # [count, seconds]
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="speech", daemon=True)
+                self._thread.start()
+        self._ready.wait()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._queue = asyncio.PriorityQueue()
+        self._loop.create_task(self._worker())
+        self._ready.set()
+        self._loop.run_forever()
+
+    def submit(self, handle):
+        self.start()
+        with self._pending_lock:
+            self._pending += 1
+            self._idle.clear()
+            self._seq += 1
+            seq = self._seq
+            if handle.priority == NARRATION:
+                # only the newest narration matters; older queued ones are dropped
+                for old in self._queued_narration:
+                    old.cancel("coalesced")
+                self._queued_narration = [handle]
+            if handle.priority == CHAT and handle.pcm is None:
+                self._queued_chat.append(handle)
+            if handle.reply is not None and handle.reply in self._preempted_replies:
+                handle.cancel("preempted")      # a later sentence of a reply that was cut
+            current = self._current
+            if current is not None and handle.priority < current.priority:
+                print(f"⏭️ {PRIORITY_NAMES[handle.priority]} cuts {PRIORITY_NAMES[current.priority]} speech.")
+                self.stats["preempted"] += 1
+                current.cancel("preempted")
+                if current.reply is not None:
+                    # the rest of a cut reply would resume mid-thought after the interruption
+                    self._preempted_replies.append(current.reply)
+                    for queued in self._queued_chat:
+                        if queued.reply is current.reply:
+                            queued.cancel("preempted")
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, (handle.priority, seq, handle))
+        if handle.priority == CHAT and handle.pcm is None:
+            self._loop.call_soon_threadsafe(self._prefetch_next)
+        return handle
+
+    def _prefetch_next(self):
+        """
+        Streamed replies arrive sentence by sentence: synthesize the next
+        PREFETCH_ITEMS queued ones while the current one plays, so there is no
+        gap between them. Runs on the speech loop, at submit and whenever an
+        item is dequeued; the rest wait their turn instead of all hitting
+        edge-tts at once.
+        """
+        with self._pending_lock:
+            upcoming = [h for h in self._queued_chat if h.cancelled is None][:PREFETCH_ITEMS]
+        for handle in upcoming:
+            if not handle.prefetched:
+                self._prefetch(handle)
+
+    def _prefetch(self, handle):
+        """Start synthesizing the first chunks of a queued item (on the speech loop)."""
+        if handle.cancelled is not None or not health["edge-tts"].available():
+            return
+        for j, chunk in enumerate(split_chunks(handle.text)[:LOOKAHEAD + 1]):
+            handle.prefetched[j] = asyncio.ensure_future(_synthesize_cached(chunk))
+        handle._on_cancel(lambda: self._loop.call_soon_threadsafe(self._drop_prefetch, handle))
+
+    @staticmethod
+    def _drop_prefetch(handle):
+        for task in handle.prefetched.values():
+            task.cancel()
+        handle.prefetched.clear()
+
+    def barge_in(self) -> bool:
+        """The user started talking: stop current speech (except alerts) and queued narration."""
+        with self._pending_lock:
+            current = self._current
+            for old in self._queued_narration:
+                old.cancel("barge-in")
+            self._queued_narration = []
+            if current is None or current.priority == ALERT:
+                return False
+            self.stats["barge_in"] += 1
+            current.cancel("barge-in")
+        print("✋ Barge-in: stopped speaking.")
         return True
-    except Exception as e:
-        print("❌ pyttsx3 error:", e)
-        return False
-
-def say(text):
-    text = (text or "").strip()
-    if not text:
-        return
-    print(f"🗣️ Chacha will say: {text}")
-    with _speech_lock:
+
+    def run_coroutine(self, coro):
+        """Run a coroutine on the speech loop from any thread (concurrent Future)."""
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
+    async def _worker(self):
+        while True:
+            _, _, handle = await self._queue.get()
+            with self._pending_lock:
+                if handle in self._queued_narration:
+                    self._queued_narration.remove(handle)
+                if handle in self._queued_chat:
+                    self._queued_chat.remove(handle)
+                if handle.priority == NARRATION and time.perf_counter() - handle.queued_at > NARRATION_MAX_AGE:
+                    handle.cancelled = handle.cancelled or "stale"
+                if handle.cancelled is None:
+                    self._current = handle
+            self._prefetch_next()
+            try:
+                if handle.cancelled is None:
+                    await self._speak(handle)
+                else:
+                    self._drop_prefetch(handle)
+                    self.stats["dropped"] += 1
+                    print(f"🗑️ Dropped {handle.cancelled} speech: {handle.text[:40]}")
+            except Exception as e:
+                self.stats["errors"] += 1
+                print("⚠️ Voice.say exception:", e)
+            finally:
+                handle._done.set()
+                with self._pending_lock:
+                    self._current = None
+                    self._pending -= 1
+                    if self._pending == 0:
+                        self._idle.set()
+
+    async def _speak(self, handle):
+        loop = asyncio.get_running_loop()
+        handle.started_at = time.perf_counter()
+        self.stats["queue_wait"] += handle.queue_wait
+        waits = self.wait_by_priority[PRIORITY_NAMES[handle.priority]]
+        waits[0] += 1
+        waits[1] += handle.queue_wait
+        edge, offline = health["edge-tts"], health["pyttsx3"]
+        self.speaking.set()
         try:
-            tmp = "temp_chacha.mp3"
-            ok = asyncio.run(_edge_tts_save(text, tmp))
-            if ok and os.path.exists(tmp):
-                try:
-                    playsound(tmp)
-                except Exception as e:
-                    print("⚠️ playsound error:", e)
-                try:
-                    os.remove(tmp)
-                except:
+            spoken = False
+            try:
+                if handle.pcm is not None:
+                    spoken = await self._play_pcm(handle, loop)
+                if spoken or handle.cancelled is not None:
                     pass
-            else:
-                _speak_offline(text)
-        except Exception as e:
-            print("⚠️ Voice.say exception:", e)
-            _speak_offline(text)
+                elif edge.available() or not offline.available():
+                    spoken = await self._speak_edge(handle, loop)
+                else:
+                    edge.skipped()
+            except Exception as e:
+                # sound device / decoder failure: the offline engine says it instead
+                self.stats["errors"] += 1
+                print(f"❌ Playback error ({handle.backend or 'edge-tts'}), offline voice takes over:", e)
+                handle._release_output()
+                spoken = False
+            if not spoken and handle.cancelled is None:
+                handle.backend = "pyttsx3"
+                self.stats["offline"] += 1
+                t0 = time.perf_counter()
+                stop = threading.Event()
+                handle._on_cancel(stop.set)
+                ok, start_delay = await loop.run_in_executor(None, _offline.speak, handle.text, stop)
+                handle.first_audio = t0 + start_delay - handle.started_at
+                handle.play_time = time.perf_counter() - t0 - start_delay
+                if ok:
+                    offline.success(start_delay)
+                elif handle.cancelled is None:
+                    offline.failure()
+        finally:
+            self.speaking.clear()
+            self.last_spoken_end = time.monotonic()
+        self.stats["first_audio"] += handle.first_audio or 0.0
+        self.stats["synth"] += handle.synth_time or 0.0
+        self.stats["play"] += handle.play_time or 0.0
+        self.stats["spoken"] += 1
+        cut = f" | cut ({handle.cancelled})" if handle.cancelled else ""
+        print(f"🔈 {handle.backend or '-'} ({handle.chunks or 1} chunk(s)){cut}: queue {handle.queue_wait * 1000:.0f} ms | "
+              f"first audio {(handle.first_audio or 0) * 1000:.0f} ms | "
+              f"synth {(handle.synth_time or 0) * 1000:.0f} ms | play {(handle.play_time or 0) * 1000:.0f} ms")
+
+    async def _play_pcm(self, handle, loop) -> bool:
+        """Play the spliced template PCM on the shared output stream; False without one."""
+        output = audio_output.get_output()
+        if output is None:
+            return False
+        stop = threading.Event()
+        handle._on_cancel(stop.set)
+        handle.backend = "template"
+        handle.synth_time = 0.0
+        t0 = time.perf_counter()
+        first = []
+        await loop.run_in_executor(None, output.write, handle.pcm, stop,
+                                   lambda: first.append(time.perf_counter()))
+        first_audio_at = first[0] if first else t0
+        handle.first_audio = first_audio_at - handle.started_at
+        handle.play_time = time.perf_counter() - first_audio_at
+        return True
+
+    async def _speak_edge(self, handle, loop) -> bool:
+        """
+        Speak text chunk by chunk from edge-tts; False if nothing was played.
+        The first chunk streams straight into playback while up to LOOKAHEAD
+        following chunks synthesize in the background.
+        """
+        chunks = split_chunks(handle.text)
+        handle.chunks = len(chunks)
+        tasks = dict(handle.prefetched)     # started while this item was queued
+        handle.prefetched.clear()
+        if tasks:
+            self.stats["prefetched"] += 1
+
+        def look_ahead(i):
+            for j in range(i, min(len(chunks), i + LOOKAHEAD + 1)):
+                if j not in tasks:
+                    tasks[j] = asyncio.ensure_future(_synthesize_cached(chunks[j]))
+
+        playback = audio_output.open_playback()
+        streaming = playback is not None and playback.streaming
+        if playback is not None:
+            handle._on_cancel(playback.stop)
+        first_audio_at = None
+        try:
+            look_ahead(1)
+            for i, chunk in enumerate(chunks):
+                if handle.cancelled is not None:
+                    break
+                if i == 0:
+                    # hedge: no edge audio within EDGE_DEADLINE → the offline engine speaks instead
+                    got_audio = asyncio.Event()
+                    if 0 in tasks:
+                        tasks[0] = asyncio.ensure_future(
+                            _replay_synthesis(tasks[0], playback if streaming else None, got_audio))
+                    else:
+                        tasks[0] = asyncio.ensure_future(
+                            _synthesize_cached(chunk, playback if streaming else None, got_audio))
+                    waiter = asyncio.ensure_future(got_audio.wait())
+                    await asyncio.wait({tasks[0], waiter}, timeout=EDGE_DEADLINE,
+                                       return_when=asyncio.FIRST_COMPLETED)
+                    waiter.cancel()
+                    if not got_audio.is_set() and handle.cancelled is None:
+                        reason = "error" if tasks[0].done() else f"no audio in {EDGE_DEADLINE:.1f}s"
+                        print(f"⏱️ edge-tts: {reason}, offline voice takes over.")
+                        health["edge-tts"].failure(reason)
+                        if playback is not None:
+                            playback.stop()
+                            await loop.run_in_executor(None, playback.finish)
+                        return False
+                    if handle.cancelled is not None:
+                        break
+                    health["edge-tts"].success(time.perf_counter() - handle.started_at)
+                    data = await tasks[0]
+                else:
+                    look_ahead(i)
+                    data = await tasks[i]
+                if i == len(chunks) - 1:
+                    handle.synth_time = time.perf_counter() - handle.started_at
+                if data is None:
+                    print(f"⚠️ Chunk {i + 1}/{len(chunks)} could not be synthesized, skipped.")
+                    continue
+                if streaming:
+                    if i > 0:
+                        playback.feed(data)
+                    continue
+                # buffered backends / playsound: play this chunk, the next ones keep synthesizing
+                t0 = await self._play_chunk(handle, chunk, data, loop)
+                first_audio_at = first_audio_at or t0
+            if streaming:
+                if playback.fed_bytes == 0:
+                    playback.stop()
+                await loop.run_in_executor(None, playback.finish)
+                first_audio_at = playback.first_audio_at
+        finally:
+            for task in tasks.values():
+                task.cancel()
+        if first_audio_at is None:
+            return False
+        handle.backend = f"edge-tts/{playback.backend if playback is not None else 'playsound'}"
+        handle.first_audio = first_audio_at - handle.started_at
+        handle.play_time = time.perf_counter() - first_audio_at
+        return True
+
+    async def _play_chunk(self, handle, chunk, data, loop):
+        """Play one synthesized chunk to the end; perf_counter of its first audio or None."""
+        playback = audio_output.open_playback()
+        if playback is None:
+            path = tts_cache.path_for(_edge_cache_key(chunk)) if tts_cache.dir else None
+            if path is None or not path.exists():
+                return None
+            t0 = time.perf_counter()
+            await loop.run_in_executor(None, playsound, str(path))
+            return t0
+        handle._on_cancel(playback.stop)
+        playback.feed(data)
+        await loop.run_in_executor(None, playback.finish)
+        return playback.first_audio_at
+
+    def flush(self, timeout=None) -> bool:
+        """Wait until everything queued so far has been spoken."""
+        return self._idle.wait(timeout)
+
+
+_service = _SpeechService()
+templates = TemplateBank(_render_segment, f"{EDGE_VOICE}/{EDGE_RATE}")
+
+
+def say(text, wait=False, priority=ACK, reply=None):
+    """
+    Queue text for speaking and return a SpeechHandle (wait=True blocks until spoken).
+    priority: ALERT > ACK (default) > CHAT > NARRATION.
+    reply: any object shared by the sentences of one streamed reply; when one of
+    them is preempted, the rest (queued or still to come) are dropped too.
+    """
+    return _submit(SpeechHandle((text or "").strip(), priority, reply=reply), wait)
+
+
+def say_template(name, wait=False, priority=ACK, **values):
+    """
+    say() for a speech_templates.TEMPLATES phrase: spliced from pre-rendered
+    segments when they are all there, otherwise synthesized like any text.
+    """
+    pcm = templates.splice(name, **values) if audio_output.get_output() is not None else None
+    return _submit(SpeechHandle(templates.text(name, **values), priority, pcm), wait)
+
+
+def _submit(handle, wait):
+    if not handle.text:
+        handle._done.set()
+        return handle
+    print(f"🗣️ Chacha will say: {handle.text}" + (" (spliced)" if handle.pcm is not None else ""))
+    _service.submit(handle)
+    if wait:
+        handle.wait()
+    return handle
+
+
+def flush(timeout=None) -> bool:
+    return _service.flush(timeout)
+
+
+_barge_in_listeners = []
+
+
+def on_barge_in(fn):
+    """Call fn() whenever barge-in stops speech (e.g. to stop generating more); returns a remover."""
+    _barge_in_listeners.append(fn)
+    return lambda: _barge_in_listeners.remove(fn) if fn in _barge_in_listeners else None
+
+
+def barge_in() -> bool:
+    """AudioStream callback: user speech over playback stops it; True if something stopped."""
+    stopped = _service.barge_in()
+    if stopped:
+        for fn in list(_barge_in_listeners):
+            fn()
+    return stopped
+
+
+def is_speaking() -> bool:
+    """True while audio plays (and ECHO_TAIL after), so the mic can ignore our own voice."""
+    return _service.speaking.is_set() or time.monotonic() - _service.last_spoken_end < ECHO_TAIL
+
+
+def prewarm_cache(phrases=None):
+    """Synthesize the chunks of the fixed phrases into the cache on the speech loop."""
+    done = 0
+    for phrase in phrases or PREWARM_PHRASES:
+        for text in split_chunks(phrase):
+            if not tts_cache.contains(_edge_cache_key(text)):
+                if _service.run_coroutine(_synthesize_cached(text)).result() is not None:
+                    done += 1
+    print(f"🔊 TTS cache: {done} phrases pre-rendered, {len(tts_cache)} cached "
+          f"({tts_cache.total_bytes // 1024} KB).")
+    return done
+
+
+def prewarm_templates(names=None):
+    """Render the template segments that are not on disk yet (needs edge-tts once)."""
+    if audio_output.get_output() is None or audio_output.backend_name() not in ("ffmpeg", "miniaudio"):
+        print("🔊 Template speech off: needs PyAudio and ffmpeg / miniaudio.")
+        return 0
+    done = templates.prerender(names)
+    print(f"🔊 Template speech: {done} segments rendered, {len(templates.cache)} on disk.")
+    return done
+
+
+def speech_metrics():
+    """Average queue / first-audio / synthesis / playback seconds per spoken item."""
+    s = _service.stats
+    n = s["spoken"] or 1
+    return {"spoken": s["spoken"], "offline": s["offline"], "errors": s["errors"],
+            "avg_queue_wait": s["queue_wait"] / n, "avg_first_audio": s["first_audio"] / n,
+            "avg_synth": s["synth"] / n, "avg_play": s["play"] / n,
+            "preempted": s["preempted"], "barge_in": s["barge_in"], "dropped": s["dropped"],
+            "prefetched": s["prefetched"]}
+
+
+def priority_waits():
+    """Average queue wait (seconds) per priority level that was spoken at least once."""
+    return {name: total / count for name, (count, total) in _service.wait_by_priority.items() if count}
+
+
+def backend_report():
+    """One line per speech backend: health counters + first-audio latency histogram."""
+    return [h.report() for h in health.values()]
+
+
+# ----------------------------------------------------------
+# 🧪 Benchmark: whole text vs sentence chunks
+# ----------------------------------------------------------
+BENCH_TEXT = (
+    "Yeh ek coffee mug hai. Isse aam taur par chai ya coffee peene ke liye use kiya jaata hai, "
+    "aur yeh ceramic ya steel ka ho sakta hai. Garam cheez daalte waqt handle se pakdein। "
+    "Agar aap chahein to main aapko iske baare mein aur bata sakta hoon।"
+)
+
+
+async def _timed_stream(text):
+    """(seconds to first mp3 byte, seconds to last byte) straight from edge-tts, no cache."""
+    t0 = time.perf_counter()
+    first = None
+    async for _ in _edge_stream(text):
+        first = first or time.perf_counter()
+    return (first or time.perf_counter()) - t0, time.perf_counter() - t0
+
+
+async def _bench(text, rounds=3):
+    chunks = split_chunks(text)
+    print(f"📝 {len(text)} chars → {len(chunks)} chunks: {[len(c) for c in chunks]}")
+    whole, chunked = [], []
+    for _ in range(rounds):
+        whole.append(await _timed_stream(text))
+        t0 = time.perf_counter()
+        first = asyncio.ensure_future(_timed_stream(chunks[0]))
+        rest = [asyncio.ensure_future(_timed_stream(c)) for c in chunks[1:LOOKAHEAD + 1]]
+        ttfb, done = await first
+        await asyncio.gather(*rest)
+        chunked.append((ttfb, done, time.perf_counter() - t0))
+
+    def avg(rows, i):
+        return sum(r[i] for r in rows) / len(rows) * 1000
+
+    print(f"whole text   : first byte {avg(whole, 0):6.0f} ms | ready to play (buffered) {avg(whole, 1):6.0f} ms")
+    print(f"first chunk  : first byte {avg(chunked, 0):6.0f} ms | ready to play (buffered) {avg(chunked, 1):6.0f} ms")
+    print(f"look-ahead   : chunks 1..{LOOKAHEAD + 1} synthesized after {avg(chunked, 2):6.0f} ms")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Chacha speech output")
+    parser.add_argument("text", nargs="?", default=BENCH_TEXT)
+    parser.add_argument("--bench", action="store_true",
+                        help="time-to-first-audio of whole-text vs chunked synthesis (needs network)")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+    if args.bench:
+        asyncio.run(_bench(args.text, args.rounds))
+    else:
+        say(args.text, wait=True)
+        print("📊 Speech:", speech_metrics())
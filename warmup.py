@@ -0,0 +1,83 @@
+# warmup.py
+# ----------------------------------------------------------
+# Background warm-up of heavy resources for Chacha
+# - YOLO, Gemini, pygame mixer, offline TTS ... start in parallel
+#   worker threads right after the greeting
+# - each resource has a readiness future; a handler waits only for
+#   the resource it needs (with a timeout) and degrades otherwise
+# ----------------------------------------------------------
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_WORKERS = 4
+
+
+class WarmupManager:
+    def __init__(self, max_workers=MAX_WORKERS):
+        self._tasks = {}          # name -> callable
+        self._futures = {}        # name -> Future
+        self.durations = {}       # name -> seconds
+        self.errors = {}          # name -> exception
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="warmup")
+
+    def register(self, name: str, fn):
+        self._tasks[name] = fn
+
+    def _run(self, name, fn):
+        t0 = time.perf_counter()
+        try:
+            return fn()
+        except Exception as e:
+            self.errors[name] = e
+            print(f"❌ Warm-up {name} failed:", e)
+            raise
+        finally:
+            self.durations[name] = time.perf_counter() - t0
+            if name not in self.errors:
+                print(f"🔥 Warm-up: {name} ready in {self.durations[name] * 1000:.0f} ms")
+
+    def start(self, names=None):
+        """Submit every registered resource (or just `names`) to the pool."""
+        with self._lock:
+            for name in names or list(self._tasks):
+                if name not in self._futures and name in self._tasks:
+                    self._futures[name] = self._pool.submit(self._run, name, self._tasks[name])
+        return self
+
+    def future(self, name: str):
+        return self._futures.get(name)
+
+    def ready(self, name: str) -> bool:
+        """True once the resource finished warming successfully."""
+        f = self._futures.get(name)
+        return f is not None and f.done() and f.exception() is None
+
+    def warming(self, name: str) -> bool:
+        """True while the resource was started but has not finished yet."""
+        f = self._futures.get(name)
+        return f is not None and not f.done()
+
+    def wait(self, name: str, timeout=None) -> bool:
+        """
+        Wait for one resource. Returns True if it is usable, False if it is
+        still warming after `timeout` or failed. A resource that was never
+        started returns True: the caller initializes it lazily itself.
+        """
+        f = self._futures.get(name)
+        if f is None:
+            return True
+        try:
+            f.result(timeout=timeout)
+            return True
+        except Exception:
+            return False
+
+    def report(self):
+        return {name: ("ready" if self.ready(name) else "failed" if name in self.errors else "warming")
+                for name in self._tasks}
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)